@@ -0,0 +1,154 @@
+import asyncio
+import gzip
+import zlib
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+
+from core.config import settings
+
+try:
+    import brotli  # type: ignore[import]
+except ImportError:  # in requirements.txt; without it only gzip is accepted and served
+    brotli = None
+
+# Request bodies are only decoded with brotli releases that can bound the
+# output of each call (1.2+); older ones would inflate a bomb in one go
+_BROTLI_BOUNDED = brotli is not None and hasattr(brotli.Decompressor, "can_accept_more_data")
+
+# Compressed input is fed to the decoder in slices this big, so that a
+# highly compressible body overshoots the size limit by a bounded amount
+_DECODE_SLICE = 16 * 1024
+
+# Responses at least this big are compressed off the event loop
+_THREAD_COMPRESS_BYTES = 64 * 1024
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Request body exceeds {limit} bytes",
+    )
+
+
+def supported_encodings() -> tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+class _Decoder:
+    """Incremental decoder for one ``Content-Encoding``."""
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._zlib = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            self._zlib = zlib.decompressobj()
+        elif encoding == "br" and _BROTLI_BOUNDED:
+            self._brotli = brotli.Decompressor()
+        elif encoding not in ("", "identity"):
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Unsupported Content-Encoding: {encoding}",
+            )
+
+    def feed(self, data: bytes, room: int) -> bytes:
+        """Decode ``data``, returning at most ``room + 1`` bytes."""
+        if self.encoding in ("", "identity"):
+            return data
+        out = bytearray()
+        for start in range(0, len(data), _DECODE_SLICE):
+            piece = data[start:start + _DECODE_SLICE]
+            try:
+                if self.encoding == "br":
+                    # The output stops growing at the limit, at most one internal
+                    # block past it; input held back there is drained while there is room
+                    out += self._brotli.process(piece, output_buffer_limit=room + 1 - len(out))
+                    while not self._brotli.can_accept_more_data() and len(out) <= room:
+                        out += self._brotli.process(b"", output_buffer_limit=room + 1 - len(out))
+                else:
+                    # max_length bounds the output; unconsumed input is kept for the next call
+                    out += self._zlib.decompress(self._zlib.unconsumed_tail + piece, room + 1 - len(out))
+            except (zlib.error, getattr(brotli, "error", zlib.error)) as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid {self.encoding} request body",
+                ) from exc
+            if len(out) > room:
+                break
+        return bytes(out[:room + 1])
+
+    def complete(self) -> bool:
+        """Whether the compressed stream ended properly."""
+        if self.encoding in ("gzip", "deflate"):
+            return self._zlib.eof
+        if self.encoding == "br":
+            return self._brotli.is_finished()
+        return True
+
+
+async def read_body(request: Request, limit: int) -> bytes:
+    """Read the request body, decoding ``Content-Encoding``, and stop with 413 past ``limit`` bytes.
+
+    The limit applies to the decoded size and is enforced while the body is
+    streamed, so an oversized or decompression-bomb upload is never buffered
+    in full.
+    """
+    encoding = request.headers.get("content-encoding", "").strip().lower()
+    decoder = _Decoder(encoding)
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise _too_large(limit)
+
+    body = bytearray()
+    async for chunk in request.stream():
+        if chunk:
+            body += decoder.feed(chunk, limit - len(body))
+            if len(body) > limit:
+                raise _too_large(limit)
+    if not decoder.complete():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Truncated compressed request body",
+        )
+    return bytes(body)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best supported response encoding the client accepts."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+async def encode_response_body(body: bytes, accept_encoding: Optional[str]) -> tuple[bytes, Optional[str]]:
+    """Compress ``body`` for the client when it is big enough; returns the body and its encoding."""
+    if len(body) < settings.RESPONSE_COMPRESSION_MIN_BYTES:
+        return body, None
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return body, None
+    if len(body) >= _THREAD_COMPRESS_BYTES:
+        return await asyncio.to_thread(compress, body, encoding), encoding
+    return compress(body, encoding), encoding
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -10,6 +12,63 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    DB_CONNECTION_BUDGET: Optional[int] = None
+    DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME: float = 300.0
+    DB_POOL_ACQUIRE_TIMEOUT: Optional[float] = 10.0
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_COMMAND_TIMEOUT: Optional[float] = None
+    DB_SESSION_SETTINGS: dict[str, str] = {}
+    DB_POOL_WARMUP_IN_BACKGROUND: bool = False
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_MAX_LAG_SECONDS: float = 2.0
+    DB_REPLICA_READ_YOUR_WRITES_SECONDS: float = 5.0
+    DB_MIGRATE_ON_STARTUP: bool = False
+    DB_VERIFY_SCHEMA: bool = False
+    SESSION_CACHE_SIZE: int = 10000
+    SESSION_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_MODE: Literal["session", "stateless"] = "session"
+    REVOCATION_REFRESH_INTERVAL_SECONDS: float = 1.0
+    SESSION_REAP_INTERVAL_SECONDS: float = 300.0
+    SESSION_REAP_BATCH_SIZE: int = 1000
+    HASH_POOL_KIND: Literal["thread", "process"] = "thread"
+    HASH_POOL_SIZE: int = 4
+    HASH_QUEUE_LIMIT: int = 64
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORE: Literal["memory", "postgres"] = "memory"
+    # Off by default: a classroom behind one NAT or proxy shares an IP
+    RATE_LIMIT_IP_ENABLED: bool = False
+    RATE_LIMIT_IP_PER_MINUTE: float = 120.0
+    RATE_LIMIT_IP_BURST: int = 60
+    RATE_LIMIT_EMAIL_PER_MINUTE: float = 10.0
+    RATE_LIMIT_EMAIL_BURST: int = 5
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    UPDATE_BATCH_MAX_EVENTS: int = 500
+    UPDATE_COALESCE: bool = True
+    LOCATION_WRITE_BEHIND: bool = False
+    LOCATION_FLUSH_INTERVAL_SECONDS: float = 2.0
+    GAME_EVENT_LOG: bool = False
+    GAME_EVENT_COMPACT_INTERVAL_SECONDS: float = 5.0
+    GAME_EVENT_RETENTION_HOURS: float = 24.0
+    SAVE_MAX_BYTES: int = 1_048_576
+    SAVE_NOTEBOOK_MAX_BYTES: int = 524_288
+    SAVE_ACCESS_MAX_BYTES: int = 65_536
+    SAVE_NPC_STATE_MAX_BYTES: int = 16_384
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024
+    WEB_CONCURRENCY: Optional[int] = None
+    SERVER_BIND: str = "0.0.0.0:8000"
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1,::1"
+    SERVER_PRELOAD: bool = True
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVER_MAX_REQUESTS: int = 0
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 2.0
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 1.0
+    HEALTH_MAX_POOL_WAITING: int = 10
+    HEALTH_MAX_REPLICATION_LAG_SECONDS: float = 10.0
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_SNAPSHOT_INTERVAL_SECONDS: float = 5.0
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,13 +1,72 @@
 import asyncio
-from collections.abc import AsyncGenerator
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 from typing import Optional
 
 import asyncpg  # type: ignore[import]
+from fastapi import Cookie, HTTPException, status
 
 from core.config import settings
+from core.revocation import revocation_list
+from core.security import verify_token
+from core.session_cache import session_cache
 
 _pool: Optional[asyncpg.Pool] = None
+_replica_pools: list[asyncpg.Pool] = []
+# Replicas the health checker found down or lagging; skipped for reads
+_unavailable_replicas: set[asyncpg.Pool] = set()
+_next_replica = 0
 _pool_lock = asyncio.Lock()
+_replica_pool_lock = asyncio.Lock()
+
+ConnectionInitHook = Callable[[asyncpg.Connection], Awaitable[None]]
+_connection_init_hooks: list[ConnectionInitHook] = []
+
+
+class PoolMetrics:
+    """Counters for pool acquires; updated from the event loop only."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.acquires = 0
+        self.acquire_timeouts = 0
+        self.waiting = 0
+        self.acquire_wait_seconds_total = 0.0
+        self.acquire_wait_seconds_max = 0.0
+
+    def observe_wait(self, seconds: float) -> None:
+        self.acquires += 1
+        self.acquire_wait_seconds_total += seconds
+        if seconds > self.acquire_wait_seconds_max:
+            self.acquire_wait_seconds_max = seconds
+
+
+pool_metrics = PoolMetrics()
+
+
+def register_connection_init(hook: ConnectionInitHook) -> None:
+    """Run ``hook`` on every new pool connection (before the pool is created)."""
+    _connection_init_hooks.append(hook)
+
+
+async def _init_connection(connection: asyncpg.Connection) -> None:
+    for hook in _connection_init_hooks:
+        await hook(connection)
+
+
+def pool_max_size() -> int:
+    """Connections this worker's pool may open.
+
+    With ``DB_CONNECTION_BUDGET`` set, each of the ``WEB_CONCURRENCY``
+    workers gets an equal share of it, so adding workers never exceeds the
+    budget; otherwise ``DB_POOL_MAX_SIZE``.
+    """
+    if settings.DB_CONNECTION_BUDGET is None:
+        return settings.DB_POOL_MAX_SIZE
+    return max(1, settings.DB_CONNECTION_BUDGET // (settings.WEB_CONCURRENCY or 1))
 
 
 async def init_db_pool() -> asyncpg.Pool:
@@ -22,30 +81,144 @@ async def init_db_pool() -> asyncpg.Pool:
                         "DATABASE_URL is not set. Cannot initialize the database pool."
                     )
 
-                _pool = await asyncpg.create_pool(
-                    dsn=settings.DATABASE_URL,
-                    min_size=1,
-                    max_size=10,
-                )
+                _pool = await _create_pool(settings.DATABASE_URL)
 
     return _pool
 
 
+async def _create_pool(dsn: str) -> asyncpg.Pool:
+    max_size = pool_max_size()
+    return await asyncpg.create_pool(
+        dsn=dsn,
+        min_size=min(settings.DB_POOL_MIN_SIZE, max_size),
+        max_size=max_size,
+        max_inactive_connection_lifetime=settings.DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        command_timeout=settings.DB_COMMAND_TIMEOUT,
+        # Sent at connect time, so they are the session defaults that the
+        # RESET ALL on every release goes back to (set_config would not survive it)
+        server_settings={name: str(value) for name, value in settings.DB_SESSION_SETTINGS.items()},
+        init=_init_connection,
+    )
+
+
+async def init_replica_pools() -> list[asyncpg.Pool]:
+    """Create one pool per ``DB_REPLICA_URLS`` entry, if not created yet.
+
+    Replica pools get the same size as the primary pool; they are not
+    counted against ``DB_CONNECTION_BUDGET``, which is for the primary.
+    """
+    if not _replica_pools and settings.DB_REPLICA_URLS:
+        async with _replica_pool_lock:
+            if not _replica_pools:
+                pools = []
+                try:
+                    for dsn in settings.DB_REPLICA_URLS:
+                        pools.append(await _create_pool(dsn))
+                except Exception:
+                    for pool in pools:
+                        await pool.close()
+                    raise
+                _replica_pools.extend(pools)
+    return _replica_pools
+
+
+def get_replica_pools() -> list[asyncpg.Pool]:
+    """Replica pools created so far (empty without replicas)."""
+    return _replica_pools
+
+
+def set_replica_available(pool: asyncpg.Pool, available: bool) -> None:
+    """Include ``pool`` in read routing or leave it out."""
+    if available:
+        _unavailable_replicas.discard(pool)
+    else:
+        _unavailable_replicas.add(pool)
+
+
+def pick_replica() -> Optional[asyncpg.Pool]:
+    """Next available replica pool in round-robin order, or None."""
+    global _next_replica
+    for _ in range(len(_replica_pools)):
+        pool = _replica_pools[_next_replica % len(_replica_pools)]
+        _next_replica += 1
+        if pool not in _unavailable_replicas:
+            return pool
+    return None
+
+
+@asynccontextmanager
+async def acquire_read_connection() -> AsyncIterator[asyncpg.Connection]:
+    """Acquire a connection for read-only queries: a replica if one is available, else the primary.
+
+    Replicas may lag behind the primary; callers that must see a write
+    that just happened use ``acquire_connection`` instead. Replica pools are
+    created at startup or by the health checker, never here, so an
+    unreachable replica cannot stall requests.
+    """
+    pool = pick_replica()
+    if pool is None:
+        pool = await get_db_pool()
+    async with acquire_from(pool) as connection:
+        yield connection
+
+
+@asynccontextmanager
+async def acquire_connection() -> AsyncIterator[asyncpg.Connection]:
+    """Acquire a pool connection, recording wait time and timeouts."""
+    async with acquire_from(await get_db_pool()) as connection:
+        yield connection
+
+
+@asynccontextmanager
+async def acquire_from(pool: asyncpg.Pool) -> AsyncIterator[asyncpg.Connection]:
+    """Acquire a connection from ``pool``, recording wait time and timeouts."""
+    pool_metrics.waiting += 1
+    start = time.perf_counter()
+    try:
+        connection = await pool.acquire(timeout=settings.DB_POOL_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError as exc:
+        pool_metrics.acquire_timeouts += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database busy, please retry",
+            headers={"Retry-After": "1"},
+        ) from exc
+    finally:
+        pool_metrics.waiting -= 1
+    pool_metrics.observe_wait(time.perf_counter() - start)
+
+    try:
+        yield connection
+    finally:
+        await pool.release(connection)
+
+
+def get_pool_stats() -> dict:
+    """Return pool occupancy and acquire metrics."""
+    size = _pool.get_size() if _pool is not None else 0
+    idle = _pool.get_idle_size() if _pool is not None else 0
+    return {
+        "size": size,
+        "idle": idle,
+        "in_use": size - idle,
+        "max_size": pool_max_size(),
+        "waiting": pool_metrics.waiting,
+        "acquires": pool_metrics.acquires,
+        "acquire_timeouts": pool_metrics.acquire_timeouts,
+        "acquire_wait_seconds_total": pool_metrics.acquire_wait_seconds_total,
+        "acquire_wait_seconds_max": pool_metrics.acquire_wait_seconds_max,
+    }
+
+
 async def get_db_connection() -> AsyncGenerator[asyncpg.Connection, None]:
     """Yield a database connection from the shared pool."""
-    pool = await get_db_pool()
-    async with pool.acquire() as connection:
+    async with acquire_connection() as connection:
         yield connection
 
 
-from fastapi import Cookie, Depends, HTTPException, status
-from core.security import verify_token
-
-async def get_current_user(
-    access_token: str | None = Cookie(default=None),
-    connection: asyncpg.Connection = Depends(get_db_connection),
-) -> int:
-    """Validate the session and return the user ID."""
+def get_token_payload(access_token: str | None) -> dict:
+    """Decode the access token cookie; the signature and ``exp`` are checked here."""
     if not access_token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
     
@@ -53,23 +226,62 @@ async def get_current_user(
         access_token = access_token.split(" ")[1]
 
     payload = verify_token(access_token)
-    if not payload:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-    
-    session_id = payload.get("session_id")
-    if not session_id:
+    if not payload or not payload.get("session_id"):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    return payload
 
-    session = await connection.fetchrow(
-        "SELECT user_id FROM session WHERE session_id = $1 AND time_expire > NOW()",
-        session_id,
-    )
+
+def get_token_session_id(access_token: str | None) -> str:
+    """Decode the access token cookie and return its session ID."""
+    return get_token_payload(access_token)["session_id"]
+
+
+async def get_session_user(session_id: str) -> int:
+    """Return the user ID of a live session, checking the cache first."""
+    # Steady gameplay traffic is served from the cache without touching the pool
+    user_id = session_cache.get(session_id)
+    if user_id is not None:
+        return user_id
+
+    # Always the primary: a replica could still return a session deleted by
+    # logout or a newer login, and the cache would then keep it for its TTL
+    async with acquire_connection() as connection:
+        session = await connection.fetchrow(
+            "SELECT user_id, time_expire FROM session WHERE session_id = $1 AND time_expire > NOW()",
+            session_id,
+        )
     if not session:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-    
+
+    session_cache.set(session_id, session["user_id"], session["time_expire"])
     return session["user_id"]
 
 
+async def authenticate(payload: dict) -> int:
+    """Return the user ID for a decoded token.
+
+    In ``stateless`` mode the token is trusted on its signature and ``exp``
+    unless its session was revoked, so no database round trip is needed.
+    """
+    if settings.AUTH_MODE != "stateless":
+        return await get_session_user(payload["session_id"])
+
+    # Re-checked here for long-lived connections that reuse a decoded payload
+    if payload.get("exp", 0) <= time.time() or revocation_list.is_revoked(payload["session_id"]):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    try:
+        return int(payload["sub"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+
+async def get_current_user(
+    access_token: str | None = Cookie(default=None),
+) -> int:
+    """Validate the session and return the user ID."""
+    return await authenticate(get_token_payload(access_token))
+
+
 async def get_db_pool() -> asyncpg.Pool:
     """Ensure a pool exists and return it."""
     if _pool is None:
@@ -78,8 +290,11 @@ async def get_db_pool() -> asyncpg.Pool:
 
 
 async def close_db_pool() -> None:
-    """Close the global database pool."""
+    """Close the global database pool and the replica pools."""
     global _pool
     if _pool is not None:
         await _pool.close()
         _pool = None
+    while _replica_pools:
+        await _replica_pools.pop().close()
+    _unavailable_replicas.clear()
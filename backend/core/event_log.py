@@ -0,0 +1,103 @@
+import asyncio
+from typing import Optional
+
+import asyncpg  # type: ignore[import]
+import orjson
+
+from core.config import settings
+from core.database import acquire_connection
+from core.saves import _fetch_tail, _lock_save, fold_save
+
+
+class EventCompactor:
+    """Folds logged game events into the ``game_saves`` snapshots.
+
+    Each pass compacts the users who logged events since the previous pass,
+    then deletes folded events older than the retention window. Compaction
+    does not change what a sync returns, so the save version and ETag stay
+    the same.
+    """
+
+    def __init__(self) -> None:
+        # Highest event id already looked at; events are only ever appended
+        self._watermark = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def compact_user(self, connection: asyncpg.Connection, user_id: int) -> bool:
+        """Fold the user's pending events into their snapshot; returns whether any were folded."""
+        async with connection.transaction():
+            row = await _lock_save(connection, user_id, create=False)
+            if row is None:
+                return False
+            tail = await _fetch_tail(connection, user_id, row["last_event_id"])
+            if tail["last_id"] is None:
+                return False
+            await connection.execute(
+                "UPDATE game_saves SET game_data = $2, last_event_id = $3 WHERE user_id = $1",
+                user_id,
+                orjson.dumps(fold_save(row["game_data"], tail["events"])).decode(),
+                tail["last_id"],
+            )
+        return True
+
+    async def compact(self, connection: asyncpg.Connection) -> int:
+        """Run one compaction pass and return the number of users compacted."""
+        high = await connection.fetchval("SELECT COALESCE(max(event_id), 0) FROM game_events")
+        user_ids = await connection.fetch(
+            "SELECT DISTINCT user_id FROM game_events WHERE event_id > $1 AND event_id <= $2",
+            self._watermark,
+            high,
+        )
+        compacted = 0
+        for record in user_ids:
+            if await self.compact_user(connection, record["user_id"]):
+                compacted += 1
+        # An event committed late below the watermark is still folded on
+        # reads, and compacted with the user's next event
+        self._watermark = max(self._watermark, high)
+
+        await connection.execute(
+            '''
+            DELETE FROM game_events AS e
+            USING game_saves AS g
+            WHERE e.user_id = g.user_id
+              AND e.event_id <= g.last_event_id
+              AND e.created_at < now() - make_interval(secs => $1)
+            ''',
+            settings.GAME_EVENT_RETENTION_HOURS * 3600,
+        )
+        return compacted
+
+    def reset(self) -> None:
+        self._watermark = 0
+
+    def start(self, interval: float) -> None:
+        """Start the periodic background compaction."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        """Stop the background compaction and run a final pass."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        async with acquire_connection() as connection:
+            await self.compact(connection)
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with acquire_connection() as connection:
+                    await self.compact(connection)
+            except Exception as e:
+                print("Event compaction error:", e)
+
+
+event_compactor = EventCompactor()
@@ -0,0 +1,149 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Optional
+
+from core.config import settings
+from core.database import (
+    acquire_connection,
+    acquire_from,
+    get_pool_stats,
+    init_replica_pools,
+    pool_metrics,
+    set_replica_available,
+)
+
+# NULL on a primary; on a standby, seconds since the last replayed
+# transaction, or 0 once everything received has been replayed (an idle
+# primary sends nothing new, which is not lag)
+_REPLICATION_LAG_QUERY = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN NULL
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END::float8
+"""
+
+# A result this many intervals old means the checker itself is stuck
+_STALE_INTERVALS = 3
+
+
+class HealthChecker:
+    """Probes the database in the background and caches the result.
+
+    Readiness requests read the cached status plus live pool counters, so a
+    load balancer probing often costs no connections. The checker runs one
+    short query per ``HEALTH_CHECK_INTERVAL_SECONDS`` per worker.
+
+    Replicas are probed in a separate loop, so a slow or unreachable one
+    never delays the primary check. One that is down or lags more than
+    ``DB_REPLICA_MAX_LAG_SECONDS`` gets no reads until it recovers; that
+    does not make the worker unready, since reads fall back to the primary.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: list[asyncio.Task] = []
+        self.reset()
+
+    def reset(self) -> None:
+        self.db_status = "unknown"
+        self.replication_lag_seconds: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.new_acquire_timeouts = 0
+        self.replicas_available = 0
+        self._acquire_timeouts = pool_metrics.acquire_timeouts
+
+    async def check(self) -> None:
+        """Run one probe and cache its result."""
+        try:
+            async with asyncio.timeout(settings.HEALTH_CHECK_TIMEOUT_SECONDS):
+                async with acquire_connection() as connection:
+                    lag = await connection.fetchval(_REPLICATION_LAG_QUERY)
+            self.db_status = "connected"
+            self.replication_lag_seconds = lag
+        except Exception:
+            self.db_status = "disconnected"
+            self.replication_lag_seconds = None
+        timeouts = pool_metrics.acquire_timeouts
+        self.new_acquire_timeouts = timeouts - self._acquire_timeouts
+        self._acquire_timeouts = timeouts
+        self.checked_at = time.monotonic()
+
+    async def check_replicas(self) -> None:
+        """Probe every replica pool and include or exclude it from read routing."""
+        try:
+            # Bounded like the probes; an unreachable replica is retried next time
+            async with asyncio.timeout(settings.HEALTH_CHECK_TIMEOUT_SECONDS):
+                pools = await init_replica_pools()
+        except Exception as e:
+            print("Replica pool error:", repr(e))
+            pools = []
+        available = 0
+        for pool in pools:
+            try:
+                async with asyncio.timeout(settings.HEALTH_CHECK_TIMEOUT_SECONDS):
+                    async with acquire_from(pool) as connection:
+                        lag = await connection.fetchval(_REPLICATION_LAG_QUERY)
+                ok = (lag or 0) <= settings.DB_REPLICA_MAX_LAG_SECONDS
+            except Exception:
+                ok = False
+            set_replica_available(pool, ok)
+            available += ok
+        self.replicas_available = available
+
+    def readiness(self) -> dict:
+        """Cached status and live pool counters, with the reasons (if any) to shed traffic."""
+        stats = get_pool_stats()
+        age = None if self.checked_at is None else time.monotonic() - self.checked_at
+        reasons = []
+        if age is None:
+            reasons.append("database not checked yet")
+        elif age > _STALE_INTERVALS * settings.HEALTH_CHECK_INTERVAL_SECONDS:
+            reasons.append("database status is stale")
+        if self.db_status == "disconnected":
+            reasons.append("database disconnected")
+        if stats["waiting"] > settings.HEALTH_MAX_POOL_WAITING:
+            reasons.append("connection pool saturated")
+        if self.new_acquire_timeouts:
+            reasons.append("connection pool acquire timeouts")
+        lag = self.replication_lag_seconds
+        if lag is not None and lag > settings.HEALTH_MAX_REPLICATION_LAG_SECONDS:
+            reasons.append("replication lag too high")
+        return {
+            "ok": not reasons,
+            "db_status": self.db_status,
+            "pool_in_use": stats["in_use"],
+            "pool_max_size": stats["max_size"],
+            "pool_waiting": stats["waiting"],
+            "replication_lag_seconds": lag,
+            "replicas_available": self.replicas_available,
+            "checked_seconds_ago": None if age is None else round(age, 3),
+            "reasons": reasons,
+        }
+
+    def start(self, interval: float) -> None:
+        """Start the periodic background checks."""
+        if not self._tasks:
+            self._tasks.append(asyncio.create_task(self._run(self.check, interval)))
+            if settings.DB_REPLICA_URLS:
+                self._tasks.append(asyncio.create_task(self._run(self.check_replicas, interval)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks.clear()
+
+    async def _run(self, probe: Callable[[], Awaitable[None]], interval: float) -> None:
+        while True:
+            try:
+                await probe()
+            except Exception as e:
+                print("Health check error:", e)
+            await asyncio.sleep(interval)
+
+
+health_checker = HealthChecker()
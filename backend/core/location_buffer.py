@@ -0,0 +1,183 @@
+import asyncio
+import json
+from typing import Any, Optional
+
+import asyncpg  # type: ignore[import]
+
+from core.config import settings
+from core.database import acquire_connection
+from core.saves import DEFAULT_SAVE_JSON, location_patch
+from models.update import UpdateEvent
+
+
+class LocationBuffer:
+    """Write-behind buffer for high-frequency location updates.
+
+    Keeps the latest location patch per user and writes all dirty entries to
+    ``game_saves`` in bulk with ``unnest``, either on the background interval or
+    when a caller forces a flush (save, sync, logout, shutdown). Entries live
+    in this worker process only.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[int, dict[str, Any]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def put(self, user_id: int, patch: dict[str, Any]) -> None:
+        """Record a location patch; later fields override earlier ones."""
+        current = self._pending.get(user_id)
+        if current is None:
+            self._pending[user_id] = dict(patch)
+        else:
+            current.update(patch)
+
+    def offer(self, user_id: int, event: UpdateEvent) -> bool:
+        """Buffer ``event`` if it is a location update and write-behind is on."""
+        if not settings.LOCATION_WRITE_BEHIND:
+            return False
+        if event.type != "location" or not isinstance(event.msg, dict):
+            return False
+        self.put(user_id, location_patch(event.msg))
+        return True
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._pending
+
+    def discard(self, user_id: int) -> None:
+        """Drop the buffered location of one user without writing it."""
+        self._pending.pop(user_id, None)
+
+    async def drop(self, user_id: int) -> None:
+        """Discard the user's buffered location once any flush in progress is done.
+
+        A flush that already took the entry could otherwise still write it
+        after the caller has deleted the user's save.
+        """
+        async with self._flush_lock:
+            self._pending.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Drop all buffered entries without writing them."""
+        self._pending.clear()
+
+    async def flush(
+        self, connection: asyncpg.Connection, user_ids: Optional[list[int]] = None
+    ) -> int:
+        """Write dirty entries (all, or only ``user_ids``) and return how many were written."""
+        async with self._flush_lock:
+            if user_ids is None:
+                batch, self._pending = self._pending, {}
+            else:
+                batch = {uid: self._pending.pop(uid) for uid in user_ids if uid in self._pending}
+            if not batch:
+                return 0
+
+            try:
+                await self._write(connection, batch)
+            except Exception:
+                # Keep the entries; anything newer that arrived meanwhile wins
+                for uid, patch in batch.items():
+                    self._pending[uid] = {**patch, **self._pending.get(uid, {})}
+                raise
+            return len(batch)
+
+    async def flush_user(self, connection: asyncpg.Connection, user_id: int) -> int:
+        """Force the buffered location of one user to the database."""
+        if user_id not in self._pending:
+            return 0
+        return await self.flush(connection, [user_id])
+
+    @staticmethod
+    async def _write(connection: asyncpg.Connection, batch: dict[int, dict[str, Any]]) -> None:
+        user_ids = list(batch)
+        locations = [batch[uid] for uid in user_ids]
+        if settings.GAME_EVENT_LOG:
+            # Appended as location events, so they stay ordered with everything else logged
+            await connection.execute(
+                '''
+                WITH created AS (
+                    INSERT INTO game_saves (user_id, game_data)
+                    SELECT user_id, $3::jsonb FROM unnest($1::int[]) AS u(user_id)
+                    ON CONFLICT (user_id) DO NOTHING
+                )
+                INSERT INTO game_events (user_id, event)
+                SELECT user_id, jsonb_build_object('type', 'location', 'msg', location)
+                FROM unnest($1::int[], $2::jsonb[]) AS u(user_id, location)
+                ''',
+                user_ids,
+                [json.dumps(location) for location in locations],
+                DEFAULT_SAVE_JSON,
+            )
+            return
+        async with connection.transaction():
+            await connection.execute(
+                '''
+                INSERT INTO game_saves (user_id, game_data)
+                SELECT user_id, $2::jsonb FROM unnest($1::int[]) AS u(user_id)
+                ON CONFLICT (user_id) DO NOTHING
+                ''',
+                user_ids,
+                DEFAULT_SAVE_JSON,
+            )
+            await connection.execute(
+                '''
+                UPDATE game_saves AS g
+                SET game_data = jsonb_set(
+                    d.doc,
+                    '{location}',
+                    CASE WHEN jsonb_typeof(d.doc->'location') = 'object' THEN d.doc->'location' ELSE '{}'::jsonb END
+                    || u.location
+                ),
+                    version = g.version + 1
+                FROM unnest($1::int[], $2::jsonb[]) AS u(user_id, location),
+                     -- As in core.saves: a stored document that is not an object
+                     -- is replaced by the default, a wrong-typed location by {}
+                     LATERAL (
+                         SELECT $3::jsonb || CASE
+                             WHEN jsonb_typeof(s.game_data) = 'object' THEN s.game_data ELSE '{}'::jsonb
+                         END AS doc
+                         FROM game_saves AS s WHERE s.user_id = u.user_id
+                     ) AS d
+                WHERE g.user_id = u.user_id
+                ''',
+                user_ids,
+                [json.dumps(location) for location in locations],
+                DEFAULT_SAVE_JSON,
+            )
+
+    def start(self, interval: float) -> None:
+        """Start the periodic background flush."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        """Stop the background flush and write whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._pending:
+            async with acquire_connection() as connection:
+                await self.flush(connection)
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            if not self._pending:
+                continue
+            try:
+                async with acquire_connection() as connection:
+                    await self.flush(connection)
+            except Exception as e:
+                print("Location flush error:", e)
+
+
+location_buffer = LocationBuffer()
@@ -0,0 +1,326 @@
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+import asyncpg  # type: ignore[import]
+
+from core.config import settings
+
+# Upper bounds in seconds; the implicit last bucket is +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+_STATEMENTS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+COUNTERS = {
+    "http_requests_total": ("HTTP requests by route, method and status.", ("route", "method", "status")),
+    "db_queries_total": ("Database statements by route and statement kind.", ("route", "statement", "outcome")),
+    # Unlabelled, read from ``counter_sources`` when a snapshot is taken
+    "db_pool_acquires_total": ("Pool acquires.", ()),
+    "db_pool_acquire_timeouts_total": ("Pool acquires that timed out.", ()),
+    "db_pool_acquire_wait_seconds_total": ("Total time spent waiting in pool acquire.", ()),
+    "session_cache_hits_total": ("Session cache hits.", ()),
+    "session_cache_misses_total": ("Session cache misses.", ()),
+}
+HISTOGRAMS = {
+    "http_request_duration_seconds": ("HTTP request latency.", ("route", "method", "status")),
+    "db_query_duration_seconds": ("Database statement latency.", ("route", "statement")),
+}
+GAUGES = {
+    "http_requests_in_flight": "HTTP requests currently being served.",
+    "db_pool_size": "Open pool connections.",
+    "db_pool_in_use": "Pool connections checked out.",
+    "db_pool_idle": "Idle pool connections.",
+    "db_pool_waiting": "Requests waiting in pool acquire.",
+    "session_cache_size": "Cached sessions.",
+    "location_buffer_pending": "Users with a buffered location not yet written.",
+}
+
+# The ASGI scope of the request being served, so DB timings can be labelled by route
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+
+class MetricsRegistry:
+    """Per-process metric values.
+
+    Everything is updated from the event loop thread, so plain dict updates
+    are safe without locks. Label values are bounded by the caller (route
+    templates, a fixed set of methods and statement kinds).
+    """
+
+    def __init__(self) -> None:
+        self.counters: dict[str, dict[tuple, float]] = {name: {} for name in COUNTERS}
+        # Per label set: bucket counts (len(LATENCY_BUCKETS) + 1), then sum
+        self.histograms: dict[str, dict[tuple, list[float]]] = {name: {} for name in HISTOGRAMS}
+        self.in_flight = 0
+        self.gauge_sources: list[Callable[[], dict[str, float]]] = []
+        # Cumulative values kept elsewhere (pool, session cache)
+        self.counter_sources: list[Callable[[], dict[str, float]]] = []
+
+    def inc(self, name: str, labels: tuple, value: float = 1) -> None:
+        series = self.counters[name]
+        series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name: str, labels: tuple, seconds: float) -> None:
+        series = self.histograms[name]
+        values = series.get(labels)
+        if values is None:
+            values = series[labels] = [0.0] * (len(LATENCY_BUCKETS) + 2)
+        values[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        values[-1] += seconds
+
+    def gauges(self) -> dict[str, float]:
+        values = {"http_requests_in_flight": float(self.in_flight)}
+        for source in self.gauge_sources:
+            values.update(source())
+        return values
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-serializable view of this process's metrics."""
+        counters = {
+            name: [[list(labels), value] for labels, value in series.items()]
+            for name, series in self.counters.items()
+        }
+        for source in self.counter_sources:
+            for name, value in source().items():
+                counters[name] = [[[], value]]
+        return {
+            "pid": os.getpid(),
+            "counters": counters,
+            "histograms": {
+                name: [[list(labels), values] for labels, values in series.items()]
+                for name, series in self.histograms.items()
+            },
+            "gauges": self.gauges(),
+        }
+
+    def reset(self) -> None:
+        for series in self.counters.values():
+            series.clear()
+        for series in self.histograms.values():
+            series.clear()
+        self.in_flight = 0
+
+
+registry = MetricsRegistry()
+
+
+def route_label(scope: dict) -> str:
+    """Route template for a request, never the raw path."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path else "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, in-flight requests and latency."""
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        token = current_scope.set(scope)
+        registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            registry.in_flight -= 1
+            current_scope.reset(token)
+
+            method = scope["method"] if scope["method"] in _METHODS else "OTHER"
+            labels = (route_label(scope), method, str(status_code))
+            registry.inc("http_requests_total", labels)
+            registry.observe("http_request_duration_seconds", labels, elapsed)
+
+
+def _on_query(record: Any) -> None:
+    scope = current_scope.get()
+    route = route_label(scope) if scope is not None else "<background>"
+    words = record.query.lstrip().split(None, 1)
+    statement = words[0].upper() if words else ""
+    if statement not in _STATEMENTS:
+        statement = "OTHER"
+
+    registry.observe("db_query_duration_seconds", (route, statement), record.elapsed)
+    outcome = "error" if record.exception is not None else "ok"
+    registry.inc("db_queries_total", (route, statement, outcome))
+
+
+async def install_query_timing(connection: asyncpg.Connection) -> None:
+    """Connection init hook timing every statement run on the connection."""
+    if settings.METRICS_ENABLED:
+        connection.add_query_logger(_on_query)
+
+
+# ---------- multi-process aggregation ----------
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def write_snapshot() -> None:
+    """Publish this worker's metrics for the other workers to aggregate."""
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    path = _snapshot_path(directory, os.getpid())
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(registry.snapshot(), fh)
+    os.replace(tmp_path, path)
+
+
+def prepare_multiproc_dir(directory: str) -> None:
+    """Create the snapshot directory and remove snapshots left by earlier runs."""
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.startswith("metrics-"):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop the gauges of an exited worker's snapshot; its counters keep counting."""
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    path = _snapshot_path(directory, pid)
+    try:
+        with open(path) as fh:
+            snapshot = json.load(fh)
+    except (OSError, ValueError):
+        return
+    snapshot["gauges"] = {}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(snapshot, fh)
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect_snapshots() -> list[dict[str, Any]]:
+    """This worker's live snapshot plus the latest one published by each other worker."""
+    snapshots = [registry.snapshot()]
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory or not os.path.isdir(directory):
+        return snapshots
+
+    own = os.path.basename(_snapshot_path(directory, os.getpid()))
+    for name in os.listdir(directory):
+        if name == own or not name.startswith("metrics-") or not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as fh:
+                snapshots.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def aggregate(snapshots: list[dict[str, Any]]) -> dict[str, Any]:
+    """Sum counters and histograms across workers; gauges only across live workers."""
+    counters: dict[str, dict[tuple, float]] = {name: {} for name in COUNTERS}
+    histograms: dict[str, dict[tuple, list[float]]] = {name: {} for name in HISTOGRAMS}
+    gauges: dict[str, float] = {}
+
+    for snapshot in snapshots:
+        for name, series in snapshot["counters"].items():
+            target = counters.setdefault(name, {})
+            for labels, value in series:
+                key = tuple(labels)
+                target[key] = target.get(key, 0) + value
+        for name, series in snapshot["histograms"].items():
+            target_h = histograms.setdefault(name, {})
+            for labels, values in series:
+                key = tuple(labels)
+                current = target_h.get(key)
+                target_h[key] = values[:] if current is None else [a + b for a, b in zip(current, values)]
+        # Counters of exited workers still count; their gauges do not
+        if snapshot["pid"] == os.getpid() or _pid_alive(snapshot["pid"]):
+            for name, value in snapshot["gauges"].items():
+                gauges[name] = gauges.get(name, 0) + value
+
+    return {"counters": counters, "histograms": histograms, "gauges": gauges}
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_prometheus(data: dict[str, Any]) -> str:
+    """Render aggregated metrics in the Prometheus text exposition format."""
+    lines: list[str] = []
+
+    for name, (help_text, label_names) in COUNTERS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in sorted(data["counters"].get(name, {}).items()):
+            lines.append(f"{name}{_format_labels(label_names, labels)} {value:g}")
+
+    for name, (help_text, label_names) in HISTOGRAMS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, values in sorted(data["histograms"].get(name, {}).items()):
+            cumulative = 0.0
+            for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                bucket_labels = _format_labels(label_names, labels, 'le="%s"' % le)
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative:g}")
+            lines.append(f"{name}_sum{_format_labels(label_names, labels)} {values[-1]:.6f}")
+            lines.append(f"{name}_count{_format_labels(label_names, labels)} {cumulative:g}")
+
+    for name, help_text in GAUGES.items():
+        if name not in data["gauges"]:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {data['gauges'][name]:g}")
+
+    return "\n".join(lines) + "\n"
+
+
+async def run_snapshot_writer(interval: float) -> None:
+    """Background task publishing this worker's snapshot every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            write_snapshot()
+        except OSError as e:
+            print("Metrics snapshot error:", e)
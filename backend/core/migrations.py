@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+import os
+import re
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+import asyncpg  # type: ignore[import]
+
+from core.config import settings
+
+MIGRATIONS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "migrations"))
+
+# Arbitrary key for pg_advisory_lock; serializes runners across processes
+MIGRATION_LOCK_ID = 110_015_001
+
+# A file starting with this line runs outside a transaction, as
+# CREATE INDEX CONCURRENTLY requires; it must then hold a single statement
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+# Waiting runners poll for the lock: a session blocked in pg_advisory_lock
+# holds a snapshot that CREATE INDEX CONCURRENTLY would wait on forever
+_LOCK_POLL_SECONDS = 0.1
+
+_FILENAME = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+
+class SchemaError(RuntimeError):
+    """The database schema is behind what this code needs."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> list[Migration]:
+    """Read the migration files in ``directory``, ordered by version."""
+    migrations: dict[int, Migration] = {}
+    for filename in os.listdir(directory):
+        match = _FILENAME.match(filename)
+        if match is None:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise SchemaError(f"Duplicate migration version {version}: {filename}")
+        with open(os.path.join(directory, filename), encoding="utf-8") as f:
+            migrations[version] = Migration(version, match.group(2), f.read())
+    return [migrations[version] for version in sorted(migrations)]
+
+
+async def _ensure_version_table(connection: asyncpg.Connection) -> None:
+    await connection.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        '''
+    )
+
+
+async def applied_versions(connection: asyncpg.Connection) -> set[int]:
+    """Versions recorded in ``schema_migrations`` (empty if the table does not exist)."""
+    exists = await connection.fetchval("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not exists:
+        return set()
+    rows = await connection.fetch("SELECT version FROM schema_migrations")
+    return {row["version"] for row in rows}
+
+
+async def apply_migrations(
+    connection: asyncpg.Connection, migrations: Optional[list[Migration]] = None
+) -> list[int]:
+    """Apply pending migrations in order and return the versions applied.
+
+    Holds an advisory lock for the duration, so several workers starting at
+    once apply each migration exactly once. Each transactional migration is
+    recorded in the same transaction that runs it.
+    """
+    if migrations is None:
+        migrations = load_migrations()
+
+    while not await connection.fetchval("SELECT pg_try_advisory_lock($1)", MIGRATION_LOCK_ID):
+        await asyncio.sleep(_LOCK_POLL_SECONDS)
+    try:
+        await _ensure_version_table(connection)
+        # Read under the lock, after any concurrent runner has finished
+        done = await applied_versions(connection)
+        applied = []
+        for migration in migrations:
+            if migration.version in done:
+                continue
+            if migration.transactional:
+                async with connection.transaction():
+                    await connection.execute(migration.sql)
+                    await _record(connection, migration)
+            else:
+                await connection.execute(migration.sql)
+                await _record(connection, migration)
+            applied.append(migration.version)
+        return applied
+    finally:
+        await connection.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+
+async def _record(connection: asyncpg.Connection, migration: Migration) -> None:
+    await connection.execute(
+        "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)",
+        migration.version,
+        migration.name,
+    )
+
+
+def required_indexes() -> set[str]:
+    """Indexes the enabled features rely on to keep queries off sequential scans."""
+    indexes = {"session_user_id_key", "session_time_expire_idx"}
+    if settings.AUTH_MODE == "stateless":
+        indexes.add("revoked_session_revoked_at_idx")
+    if settings.GAME_EVENT_LOG:
+        indexes.add("game_events_user_id_event_id_idx")
+    return indexes
+
+
+async def missing_indexes(connection: asyncpg.Connection) -> set[str]:
+    rows = await connection.fetch(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND indexname = ANY($1::text[])",
+        list(required_indexes()),
+    )
+    return required_indexes() - {row["indexname"] for row in rows}
+
+
+async def verify_schema(connection: asyncpg.Connection) -> None:
+    """Raise ``SchemaError`` if migrations are pending or required indexes are missing."""
+    done = await applied_versions(connection)
+    pending = [m.version for m in load_migrations() if m.version not in done]
+    missing = await missing_indexes(connection)
+    problems = []
+    if pending:
+        problems.append(f"pending migrations {pending}")
+    if missing:
+        problems.append(f"missing indexes {sorted(missing)}")
+    if problems:
+        raise SchemaError(
+            "Database schema is out of date: " + "; ".join(problems)
+            + ". Run `python -m core.migrations upgrade`."
+        )
+
+
+async def _main(command: str) -> int:
+    connection = await asyncpg.connect(dsn=settings.DATABASE_URL)
+    try:
+        if command == "upgrade":
+            applied = await apply_migrations(connection)
+            print("Applied migrations:", applied or "none")
+        elif command == "status":
+            done = await applied_versions(connection)
+            for migration in load_migrations():
+                state = "applied" if migration.version in done else "pending"
+                print(f"{migration.version:03d} {migration.name}: {state}")
+        else:
+            try:
+                await verify_schema(connection)
+            except SchemaError as e:
+                print(e)
+                return 1
+            print("Schema is up to date")
+    finally:
+        await connection.close()
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.migrations", description="Manage the database schema.")
+    parser.add_argument("command", choices=["upgrade", "status", "check"])
+    args = parser.parse_args(argv)
+    return asyncio.run(_main(args.command))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import copy
+from typing import Any
+
+MERGE_PATCH_CONTENT_TYPE = "application/merge-patch+json"
+JSON_PATCH_CONTENT_TYPE = "application/json-patch+json"
+
+
+class PatchError(ValueError):
+    """A patch document that is malformed or cannot be applied."""
+
+
+class PatchTestFailed(PatchError):
+    """A JSON Patch ``test`` operation did not match the current document."""
+
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """Apply an RFC 7396 merge patch and return the result.
+
+    ``target`` may be modified and parts of ``patch`` end up in the result,
+    so pass documents freshly decoded for this call.
+    """
+    if not isinstance(patch, dict):
+        return patch
+    if not isinstance(target, dict):
+        target = {}
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        else:
+            target[key] = apply_merge_patch(target.get(key), value)
+    return target
+
+
+def _parse_pointer(pointer: Any) -> list[str]:
+    """Split an RFC 6901 JSON pointer into unescaped reference tokens."""
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    if pointer == "":
+        return []
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _index(array: list, token: str, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(array)
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0"):
+        raise PatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(array) or (index == len(array) and not allow_end):
+        raise PatchError(f"Array index out of range: {token}")
+    return index
+
+
+def _get(doc: Any, tokens: list[str]) -> Any:
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_index(doc, token, allow_end=False)]
+        else:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+    return doc
+
+
+def _add(doc: Any, tokens: list[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent, key = _get(doc, tokens[:-1]), tokens[-1]
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, key, allow_end=True), value)
+    else:
+        raise PatchError(f"Cannot add to a scalar at /{'/'.join(tokens[:-1])}")
+    return doc
+
+
+def _replace(doc: Any, tokens: list[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent, key = _get(doc, tokens[:-1]), tokens[-1]
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent[_index(parent, key, allow_end=False)] = value
+    else:
+        raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+    return doc
+
+
+def _remove(doc: Any, tokens: list[str]) -> Any:
+    if not tokens:
+        raise PatchError("Cannot remove the whole document")
+    parent, key = _get(doc, tokens[:-1]), tokens[-1]
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+        return parent.pop(key)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, key, allow_end=False))
+    raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def _json_equal(a: Any, b: Any) -> bool:
+    """Equality with JSON semantics: booleans are not numbers."""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, (dict, list)) or isinstance(b, (dict, list)):
+        return False
+    return a == b
+
+
+def apply_json_patch(doc: Any, operations: Any) -> Any:
+    """Apply an RFC 6902 JSON Patch and return the result.
+
+    As with ``apply_merge_patch``, ``doc`` may be modified and values from
+    ``operations`` are used without copying.
+
+    Raises ``PatchError`` on a malformed or inapplicable operation and
+    ``PatchTestFailed`` when a ``test`` operation does not match. Callers
+    discard ``doc`` on error, so operations are not rolled back here.
+    """
+    if not isinstance(operations, list):
+        raise PatchError("JSON Patch must be an array of operations")
+
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise PatchError("Each JSON Patch operation must be an object")
+        op = operation.get("op")
+        path = _parse_pointer(operation.get("path"))
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"'{op}' operation requires a value")
+
+        if op == "add":
+            doc = _add(doc, path, operation["value"])
+        elif op == "remove":
+            _remove(doc, path)
+        elif op == "replace":
+            doc = _replace(doc, path, operation["value"])
+        elif op == "move":
+            source = _parse_pointer(operation.get("from"))
+            if path[: len(source)] == source and len(path) > len(source):
+                raise PatchError("Cannot move a value into one of its children")
+            if source != path:
+                doc = _add(doc, path, _remove(doc, source))
+        elif op == "copy":
+            source = _parse_pointer(operation.get("from"))
+            doc = _add(doc, path, copy.deepcopy(_get(doc, source)))
+        elif op == "test":
+            if not _json_equal(_get(doc, path), operation["value"]):
+                raise PatchTestFailed(f"Test failed at {operation['path']}")
+        else:
+            raise PatchError(f"Unknown JSON Patch operation: {op!r}")
+
+    return doc
+
@@ -0,0 +1,140 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import orjson
+from fastapi import HTTPException, Request, status
+
+from core.config import settings
+from core.database import acquire_connection
+from core.security import hash_busy_error, hash_queue_full
+
+
+class MemoryBucketStore:
+    """Token buckets kept in this process, in a bounded LRU.
+
+    With several workers each keeps its own buckets, so a client spread over
+    them gets up to ``workers`` times the configured rate.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Take one token; returns 0 if allowed, else the seconds until one is available."""
+        now = time.monotonic()
+        tokens, stamp = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - stamp) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+# Tokens in the bucket after refilling at $2 per second up to $3
+_REFILLED = (
+    "LEAST($3::float8, b.tokens"
+    " + GREATEST(0, EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at))::float8 * $2::float8)"
+)
+
+
+class PostgresBucketStore:
+    """Token buckets in the ``rate_limit_bucket`` table, shared by all workers.
+
+    Each check is one upsert on a short-lived pool connection; the table is
+    unlogged, so it costs no WAL and is emptied by a crash, which only resets
+    the limits.
+    """
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        async with acquire_connection() as connection:
+            row = await connection.fetchrow(
+                f'''
+                INSERT INTO rate_limit_bucket AS b (key, tokens, allowed, updated_at)
+                VALUES ($1, $3 - 1, TRUE, clock_timestamp())
+                ON CONFLICT (key) DO UPDATE
+                    SET tokens = CASE WHEN {_REFILLED} >= 1 THEN {_REFILLED} - 1 ELSE {_REFILLED} END,
+                        allowed = {_REFILLED} >= 1,
+                        updated_at = clock_timestamp()
+                RETURNING tokens, allowed
+                ''',
+                key,
+                rate,
+                float(burst),
+            )
+        return 0.0 if row["allowed"] else (1 - row["tokens"]) / rate
+
+    def clear(self) -> None:
+        pass
+
+
+memory_bucket_store = MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+postgres_bucket_store = PostgresBucketStore()
+
+
+def get_bucket_store() -> MemoryBucketStore | PostgresBucketStore:
+    if settings.RATE_LIMIT_STORE == "postgres":
+        return postgres_bucket_store
+    return memory_bucket_store
+
+
+def _too_many_requests(wait: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many attempts, please retry later",
+        headers={"Retry-After": str(max(1, math.ceil(wait)))},
+    )
+
+
+async def _request_email(request: Request) -> Optional[str]:
+    # FastAPI has already read the body, so this does not touch the network
+    try:
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        return None
+    email = body.get("user", body.get("email")) if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+async def auth_rate_limit(request: Request) -> None:
+    """Admission control for endpoints that hash a password.
+
+    Listed before the database dependency, so a rejected request costs
+    neither a pool connection nor a hash. Applies a token bucket per email
+    (and, with ``RATE_LIMIT_IP_ENABLED``, one per client IP), shared by all
+    auth endpoints, and turns requests away while the hash pool queue is
+    full. The client IP is the proxy's ``X-Forwarded-For`` address when the
+    proxy is listed in ``FORWARDED_ALLOW_IPS``.
+    """
+    if hash_queue_full():
+        raise hash_busy_error()
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    store = get_bucket_store()
+    if settings.RATE_LIMIT_IP_ENABLED:
+        client_ip = request.client.host if request.client else "unknown"
+        wait = await store.take(
+            f"ip:{client_ip}", settings.RATE_LIMIT_IP_PER_MINUTE / 60, settings.RATE_LIMIT_IP_BURST
+        )
+        if wait:
+            raise _too_many_requests(wait)
+
+    email = await _request_email(request)
+    if email is not None:
+        wait = await store.take(
+            f"email:{email}", settings.RATE_LIMIT_EMAIL_PER_MINUTE / 60, settings.RATE_LIMIT_EMAIL_BURST
+        )
+        if wait:
+            raise _too_many_requests(wait)
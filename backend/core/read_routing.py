@@ -0,0 +1,105 @@
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import asyncpg  # type: ignore[import]
+from fastapi import Cookie, Depends, Response
+
+from core.config import settings
+from core.database import acquire_connection, acquire_read_connection, get_current_user
+from core.location_buffer import location_buffer
+
+# Epoch seconds until which this client's reads go to the primary. Set on
+# writes, so the window holds whichever worker serves the next request.
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+# Expired entries are pruned once the map grows past this
+_PRUNE_THRESHOLD = 10_000
+
+
+class ReadRouter:
+    """Routes a user's read-only queries to replicas, except right after their own writes.
+
+    After a user writes their save, their reads go to the primary for
+    ``DB_REPLICA_READ_YOUR_WRITES_SECONDS``, long enough for replicas within
+    ``DB_REPLICA_MAX_LAG_SECONDS`` to catch up. The window is tracked per
+    worker and in a cookie for HTTP clients.
+    """
+
+    def __init__(self) -> None:
+        self._recent: dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def clear(self) -> None:
+        self._recent.clear()
+
+    def note_write(self, user_id: int, response: Optional[Response] = None) -> None:
+        """Send the user's reads to the primary for the read-your-writes window."""
+        if not settings.DB_REPLICA_URLS:
+            return
+        window = settings.DB_REPLICA_READ_YOUR_WRITES_SECONDS
+        if len(self._recent) >= _PRUNE_THRESHOLD:
+            now = time.monotonic()
+            self._recent = {uid: until for uid, until in self._recent.items() if until > now}
+        self._recent[user_id] = time.monotonic() + window
+        if response is not None:
+            response.set_cookie(
+                key=READ_PRIMARY_COOKIE,
+                value=f"{time.time() + window:.3f}",
+                max_age=max(1, round(window)),
+                httponly=True,
+                samesite="lax",
+                secure=not settings.DEBUG,
+            )
+
+    def use_replica(self, user_id: int, read_primary_until: Optional[str] = None) -> bool:
+        """Whether the user's reads may go to a replica right now."""
+        if not settings.DB_REPLICA_URLS:
+            return False
+        if user_id in location_buffer:
+            # The read flushes the buffered location first, on the primary
+            return False
+        until = self._recent.get(user_id)
+        if until is not None:
+            if until > time.monotonic():
+                return False
+            del self._recent[user_id]
+        if read_primary_until:
+            try:
+                return float(read_primary_until) <= time.time()
+            except ValueError:
+                pass
+        return True
+
+    @asynccontextmanager
+    async def acquire(
+        self, user_id: int, read_primary_until: Optional[str] = None
+    ) -> AsyncIterator[asyncpg.Connection]:
+        """Acquire a connection for the user's read-only queries.
+
+        The user's buffered location is written first, always on the
+        primary, and the reads then go there too.
+        """
+        if self.use_replica(user_id, read_primary_until):
+            async with acquire_read_connection() as connection:
+                # Re-checked: a location may have been buffered while waiting
+                if user_id not in location_buffer:
+                    yield connection
+                    return
+        async with acquire_connection() as connection:
+            await location_buffer.flush_user(connection, user_id)
+            yield connection
+
+
+read_router = ReadRouter()
+
+
+async def get_read_connection(
+    user_id: int = Depends(get_current_user),
+    read_primary_until: str | None = Cookie(default=None),
+) -> AsyncIterator[asyncpg.Connection]:
+    """Yield a connection for the current user's read-only queries, with their buffered location written."""
+    async with read_router.acquire(user_id, read_primary_until) as connection:
+        yield connection
@@ -0,0 +1,209 @@
+import asyncio
+import time
+from contextlib import AbstractAsyncContextManager
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+import asyncpg  # type: ignore[import]
+
+from core.config import settings
+from core.session_cache import session_cache
+
+# Re-read a little before the newest revocation seen, so rows whose
+# transaction committed after a later-timestamped one are not missed
+_COMMIT_SLACK = timedelta(seconds=5)
+
+
+class RevocationList:
+    """In-memory set of revoked session IDs for the stateless auth mode.
+
+    Logout, account deletion and re-login record the revoked sessions in the
+    ``revoked_session`` table. Every worker loads the unexpired rows at startup
+    and then polls only the rows added since the last refresh. Entries are
+    dropped once the token they revoke would have expired anyway.
+    """
+
+    def __init__(self) -> None:
+        self._revoked: dict[str, float] = {}
+        self._watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, session_id: str, time_expire: datetime) -> None:
+        """Record a revocation until ``time_expire``."""
+        self._revoked[session_id] = time_expire.timestamp()
+
+    def is_revoked(self, session_id: str) -> bool:
+        return session_id in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def clear(self) -> None:
+        self._revoked.clear()
+        self._watermark = None
+
+    def prune(self) -> None:
+        """Drop revocations whose tokens have expired."""
+        now = time.time()
+        expired = [sid for sid, expires in self._revoked.items() if expires <= now]
+        for session_id in expired:
+            del self._revoked[session_id]
+
+    async def refresh(self, connection: asyncpg.Connection) -> int:
+        """Load revocations added since the last refresh and return how many were read."""
+        if self._watermark is None:
+            rows = await connection.fetch(
+                '''
+                SELECT session_id, time_expire, revoked_at FROM revoked_session
+                WHERE time_expire > NOW()
+                '''
+            )
+        else:
+            rows = await connection.fetch(
+                '''
+                SELECT session_id, time_expire, revoked_at FROM revoked_session
+                WHERE revoked_at > $1 AND time_expire > NOW()
+                ''',
+                self._watermark - _COMMIT_SLACK,
+            )
+
+        for row in rows:
+            self.add(row["session_id"], row["time_expire"])
+            if self._watermark is None or row["revoked_at"] > self._watermark:
+                self._watermark = row["revoked_at"]
+        if self._watermark is None:
+            self._watermark = await connection.fetchval("SELECT NOW()")
+
+        self.prune()
+        return len(rows)
+
+    async def start(
+        self,
+        acquire: Callable[[], AbstractAsyncContextManager[asyncpg.Connection]],
+        interval: float,
+    ) -> None:
+        """Load the current revocations, then keep polling for new ones."""
+        async with acquire() as connection:
+            await self.refresh(connection)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(acquire, interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(
+        self,
+        acquire: Callable[[], AbstractAsyncContextManager[asyncpg.Connection]],
+        interval: float,
+    ) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with acquire() as connection:
+                    await self.refresh(connection)
+            except Exception as e:
+                print("Revocation refresh error:", e)
+
+
+revocation_list = RevocationList()
+
+
+async def end_user_sessions(connection: asyncpg.Connection, user_id: int) -> None:
+    """Delete every session of a user and make sure none of their tokens still work.
+
+    In stateless mode the deleted sessions are also recorded as revoked, since
+    tokens are not checked against the session table there.
+    """
+    if settings.AUTH_MODE != "stateless":
+        await connection.execute("DELETE FROM session WHERE user_id = $1", user_id)
+    else:
+        rows = await connection.fetch(
+            '''
+            WITH ended AS (
+                DELETE FROM session WHERE user_id = $1
+                RETURNING session_id, time_expire
+            )
+            INSERT INTO revoked_session (session_id, user_id, time_expire)
+            SELECT session_id, $1,
+                   GREATEST(time_expire, NOW() + make_interval(mins => $2))
+            FROM ended
+            ON CONFLICT (session_id) DO NOTHING
+            RETURNING session_id, time_expire
+            ''',
+            user_id,
+            settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+        )
+        # Visible in this worker at once; other workers pick it up on refresh
+        for row in rows:
+            revocation_list.add(row["session_id"], row["time_expire"])
+
+    session_cache.invalidate_user(user_id)
+
+
+async def replace_user_session(connection: asyncpg.Connection, user_id: int, session_id: str) -> None:
+    """Make ``session_id`` the user's only session, expiring after ``ACCESS_TOKEN_EXPIRE_MINUTES``.
+
+    Relies on the unique index on ``session(user_id)``: the replacement is a
+    single upsert, so concurrent logins always leave exactly one session. In
+    stateless mode the row is locked first, so the session being replaced is
+    known and can be revoked.
+    """
+    if settings.AUTH_MODE != "stateless":
+        await connection.execute(
+            '''
+            INSERT INTO session (user_id, session_id, time_expire)
+            VALUES ($1, $2, NOW() + make_interval(mins => $3))
+            ON CONFLICT (user_id) DO UPDATE
+                SET session_id = EXCLUDED.session_id,
+                    time_expire = EXCLUDED.time_expire,
+                    updated_at = CURRENT_TIMESTAMP
+            ''',
+            user_id,
+            session_id,
+            settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+        )
+    else:
+        async with connection.transaction():
+            # Inserts the new session, or locks and returns the current one
+            current = await connection.fetchrow(
+                '''
+                INSERT INTO session (user_id, session_id, time_expire)
+                VALUES ($1, $2, NOW() + make_interval(mins => $3))
+                ON CONFLICT (user_id) DO UPDATE SET user_id = EXCLUDED.user_id
+                RETURNING session_id, time_expire
+                ''',
+                user_id,
+                session_id,
+                settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+            )
+            if current["session_id"] != session_id:
+                revoked = await connection.fetchrow(
+                    '''
+                    WITH replaced AS (
+                        UPDATE session
+                        SET session_id = $2,
+                            time_expire = NOW() + make_interval(mins => $3),
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE user_id = $1
+                    )
+                    INSERT INTO revoked_session (session_id, user_id, time_expire)
+                    VALUES ($4, $1, GREATEST($5, NOW() + make_interval(mins => $3)))
+                    ON CONFLICT (session_id) DO NOTHING
+                    RETURNING session_id, time_expire
+                    ''',
+                    user_id,
+                    session_id,
+                    settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+                    current["session_id"],
+                    current["time_expire"],
+                )
+                if revoked is not None:
+                    revocation_list.add(revoked["session_id"], revoked["time_expire"])
+
+    session_cache.invalidate_user(user_id)
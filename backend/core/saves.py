@@ -0,0 +1,618 @@
+import json
+from typing import Any, Callable
+
+import asyncpg  # type: ignore[import]
+import orjson
+from fastapi import HTTPException, status
+
+from core.config import settings
+from core.state import GameState
+from models.save import Location, Npc, SaveState
+from models.update import EventResult, UpdateEvent
+
+# State written the first time a user sends an update without a save
+DEFAULT_SAVE_STATE = SaveState(
+    location=Location(room="Start", x=0, y=0),
+    notebook={},
+    access={},
+    npc=[Npc(id="npc1"), Npc(id="npc2")],
+)
+DEFAULT_SAVE_JSON = json.dumps(DEFAULT_SAVE_STATE.model_dump())
+
+# The stored document with any missing top-level keys filled from the default
+# ($2); a document that is not an object at all is replaced by the default
+_EXISTING_DOC = (
+    "($2::jsonb || CASE WHEN jsonb_typeof(game_saves.game_data) = 'object' "
+    "THEN game_saves.game_data ELSE '{}'::jsonb END)"
+)
+
+
+def _bind(params: list[Any], value: Any, cast: str) -> str:
+    """Append a bind value and return its typed placeholder."""
+    params.append(value)
+    return f"${len(params)}::{cast}"
+
+
+def _object(expr: str) -> str:
+    """``expr`` if it is a jsonb object, else an empty one (``||`` and ``jsonb_set`` need objects)."""
+    return f"CASE WHEN jsonb_typeof({expr}) = 'object' THEN {expr} ELSE '{{}}'::jsonb END"
+
+
+def _array(expr: str) -> str:
+    """``expr`` if it is a jsonb array, else an empty one."""
+    return f"CASE WHEN jsonb_typeof({expr}) = 'array' THEN {expr} ELSE '[]'::jsonb END"
+
+
+def _event_payload(event: UpdateEvent) -> dict[str, Any] | None:
+    return event.value if event.value is not None else event.msg
+
+
+def location_patch(msg: dict[str, Any]) -> dict[str, Any]:
+    """Extract the location fields from an event message."""
+    patch: dict[str, Any] = {}
+    try:
+        if "room" in msg:
+            patch["room"] = msg["room"]
+        # Coerce to int as in repo.saves
+        if "x" in msg:
+            patch["x"] = int(msg["x"])
+        if "y" in msg:
+            patch["y"] = int(msg["y"])
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Location coordinates must be integers",
+        ) from exc
+    return patch
+
+
+def compile_event(event: UpdateEvent, doc: str, params: list[Any]) -> str:
+    """Return a SQL expression that applies ``event`` to the jsonb expression ``doc``.
+
+    ``doc`` must be a jsonb object. Bind values are appended to ``params``;
+    events that carry nothing to apply compile to ``doc`` unchanged. A
+    section of the wrong type is treated as empty, so the result is always
+    an object and never NULL.
+    """
+    if event.type == "location" and isinstance(event.msg, dict):
+        location = _bind(params, json.dumps(location_patch(event.msg)), "jsonb")
+        current = _object(f"({doc})->'location'")
+        return f"jsonb_set({doc}, '{{location}}', {current} || {location})"
+
+    if event.type in ("problem", "minigame") and event.id:
+        key = _bind(params, f"completed_{event.type}s", "text")
+        item = _bind(params, event.id, "text")
+        notebook = _object(f"({doc})->'notebook'")
+        bucket = _array(f"({notebook})->{key}")
+        return (
+            f"jsonb_set({doc}, '{{notebook}}', {notebook} || jsonb_build_object("
+            f"{key}, CASE WHEN {bucket} ? {item} THEN {bucket} ELSE {bucket} || to_jsonb({item}) END))"
+        )
+
+    payload = _event_payload(event)
+
+    if event.type in ("notebook", "access") and isinstance(payload, dict):
+        section = event.type
+        patch_json = _bind(params, json.dumps(payload), "jsonb")
+        current = _object(f"({doc})->'{section}'")
+        return f"jsonb_set({doc}, '{{{section}}}', {current} || {patch_json})"
+
+    if event.type == "npc" and event.id and isinstance(payload, dict):
+        npc_id = _bind(params, event.id, "text")
+        state = _bind(params, json.dumps(payload), "jsonb")
+        npcs = _array(f"({doc})->'npc'")
+        npc_state = _object("e->'state'")
+        updated = (
+            "(SELECT COALESCE(jsonb_agg("
+            f"CASE WHEN e->>'id' = {npc_id} "
+            f"THEN e || jsonb_build_object('state', {npc_state} || {state}) "
+            "ELSE e END ORDER BY ord), '[]'::jsonb) "
+            f"FROM jsonb_array_elements({npcs}) WITH ORDINALITY AS t(e, ord))"
+        )
+        exists = f"EXISTS (SELECT 1 FROM jsonb_array_elements({npcs}) AS n(e) WHERE e->>'id' = {npc_id})"
+        appended = f"{npcs} || jsonb_build_array(jsonb_build_object('id', {npc_id}, 'state', {state}))"
+        return f"jsonb_set({doc}, '{{npc}}', CASE WHEN {exists} THEN {updated} ELSE {appended} END)"
+
+    return doc
+
+
+async def apply_update_event(
+    connection: asyncpg.Connection, user_id: int, event: UpdateEvent
+) -> None:
+    """Apply a single update event to the user's save in one atomic statement.
+
+    The event is compiled into a jsonb expression that Postgres evaluates
+    against the current row, so concurrent updates never overwrite each other.
+    A default save is created on first write. With the event log enabled
+    the event is appended to ``game_events`` instead.
+    """
+    if settings.GAME_EVENT_LOG:
+        await append_events(connection, user_id, [event])
+        return
+
+    params: list[Any] = [user_id, DEFAULT_SAVE_JSON]
+    inserted = compile_event(event, "$2::jsonb", params)
+    # Same bind values, so compile against a copy of the shared prefix
+    existing = compile_event(event, _EXISTING_DOC, params[:2])
+
+    updated = f"COALESCE({existing}, game_saves.game_data)"
+
+    # An event that changes nothing (e.g. a problem already completed) writes
+    # nothing, so the version and the ETag stay the same
+    await connection.execute(
+        f'''
+        INSERT INTO game_saves (user_id, game_data)
+        VALUES ($1, {inserted})
+        ON CONFLICT (user_id) DO UPDATE
+            SET game_data = {updated},
+                version = game_saves.version + 1
+            WHERE game_saves.game_data IS DISTINCT FROM {updated}
+        ''',
+        *params,
+    )
+
+
+async def fetch_save_json(connection: asyncpg.Connection, user_id: int) -> str | None:
+    """Return the current save as JSON text, or None if the user has no save."""
+    row = await fetch_save_if_none_match(connection, user_id, None)
+    if row is None:
+        return None
+    return save_json(row["game_data"], row["tail"])
+
+
+def save_json(game_data: Any, tail: Any = None) -> str | None:
+    """JSON text of a stored snapshot with any event log ``tail`` folded in."""
+    if tail is not None:
+        return orjson.dumps(fold_save(game_data, tail)).decode()
+    if game_data is None or isinstance(game_data, str):
+        return game_data
+    return orjson.dumps(game_data).decode()
+
+
+def _field_too_large(field: str, limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Save field {field} exceeds {limit} bytes",
+    )
+
+
+def enforce_save_limits(state: Any, size: int) -> None:
+    """Reject a save whose encoded ``size`` or any notebook, access or NPC state section is too big."""
+    if size > settings.SAVE_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Save exceeds {settings.SAVE_MAX_BYTES} bytes",
+        )
+    if not isinstance(state, dict):
+        return
+    field_limits = {
+        "notebook": settings.SAVE_NOTEBOOK_MAX_BYTES,
+        "access": settings.SAVE_ACCESS_MAX_BYTES,
+    }
+    npc_limit = settings.SAVE_NPC_STATE_MAX_BYTES
+    # No section can be bigger than the whole document
+    if size <= min(*field_limits.values(), npc_limit):
+        return
+
+    for field, limit in field_limits.items():
+        if field in state and len(orjson.dumps(state[field])) > limit:
+            raise _field_too_large(field, limit)
+    npcs = state.get("npc")
+    if isinstance(npcs, list):
+        for npc in npcs:
+            if isinstance(npc, dict) and len(orjson.dumps(npc.get("state"))) > npc_limit:
+                raise _field_too_large(f"npc[{npc.get('id')}].state", npc_limit)
+
+
+def _bad_shape(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
+
+
+def check_save_shape(state: Any) -> None:
+    """Reject a save that is not an object or whose sections have the wrong JSON type.
+
+    Sections may be left out; ``location``, ``notebook`` and ``access`` must
+    otherwise be objects and ``npc`` a list of objects, which is what the
+    update paths expect to find.
+    """
+    if not isinstance(state, dict):
+        raise _bad_shape("Save must be a JSON object")
+    for field in ("location", "notebook", "access"):
+        if field in state and not isinstance(state[field], dict):
+            raise _bad_shape(f"Save field {field} must be an object")
+    npcs = state.get("npc", [])
+    if not isinstance(npcs, list) or not all(isinstance(npc, dict) for npc in npcs):
+        raise _bad_shape("Save field npc must be a list of objects")
+
+
+def format_etag(tag: str) -> str:
+    """Quote a save tag for the ``ETag`` header; see ``_ETAG_SQL``."""
+    return f'"{tag}"'
+
+
+def parse_etags(header: str | None) -> tuple[bool, list[str]]:
+    """Split an ``If-None-Match`` or ``If-Match`` header into (wildcard, save tags named)."""
+    wildcard = False
+    tags: list[str] = []
+    for candidate in (header or "").split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate == "*":
+            wildcard = True
+        elif len(candidate) > 2 and candidate[0] == candidate[-1] == '"':
+            tags.append(candidate[1:-1])
+    return wildcard, tags
+
+
+def _etag_sql(version: str, last_event_id: str = "last_event_id", user_id: str = "user_id") -> str:
+    """SQL for the save tag: user ID and version, plus the last logged event when the log is on.
+
+    Every write to ``game_saves`` bumps the version; appended events change the
+    tag through their ID, and compaction changes neither. The user ID keeps a
+    tag cached for one account from matching another account's save at the
+    same version (``/game/sync`` is one URL for everyone).
+    """
+    if settings.GAME_EVENT_LOG:
+        return f"({user_id}::text || '-' || {version}::text || '.' || {last_event_id}::text)"
+    return f"({user_id}::text || '-' || {version}::text)"
+
+
+async def fetch_save_if_none_match(
+    connection: asyncpg.Connection, user_id: int, if_none_match: str | None
+) -> asyncpg.Record | None:
+    """Return the save's ``etag``, ``not_modified``, ``game_data`` and ``tail``, or None if there is no save.
+
+    When ``If-None-Match`` names the current tag, ``game_data`` and ``tail``
+    are left out of the result so an unchanged document is never sent over
+    the wire. ``tail`` is the JSON array of logged events not yet compacted
+    into ``game_data`` (always NULL without the event log).
+    """
+    wildcard, tags = parse_etags(if_none_match)
+    if not settings.GAME_EVENT_LOG:
+        return await connection.fetchrow(
+            f'''
+            SELECT etag, matched AS not_modified,
+                   CASE WHEN matched THEN NULL ELSE game_data END AS game_data,
+                   NULL::text AS tail
+            FROM game_saves,
+                 LATERAL (SELECT {_etag_sql("version")} AS etag) AS e,
+                 LATERAL (SELECT $2 OR etag = ANY($3::text[]) AS matched) AS m
+            WHERE user_id = $1
+            ''',
+            user_id,
+            wildcard,
+            tags,
+        )
+
+    return await connection.fetchrow(
+        f'''
+        SELECT etag, matched AS not_modified,
+               CASE WHEN matched THEN NULL ELSE g.game_data END AS game_data,
+               CASE WHEN matched OR t.last_id IS NULL THEN NULL ELSE (
+                   SELECT jsonb_agg(event ORDER BY event_id)::text FROM game_events
+                   WHERE user_id = $1 AND event_id > g.last_event_id
+               ) END AS tail
+        FROM game_saves AS g,
+             LATERAL (
+                 SELECT max(event_id) AS last_id FROM game_events
+                 WHERE user_id = $1 AND event_id > g.last_event_id
+             ) AS t,
+             LATERAL (SELECT {_etag_sql("g.version", "COALESCE(t.last_id, g.last_event_id)", "g.user_id")} AS etag) AS e,
+             LATERAL (SELECT $2 OR etag = ANY($3::text[]) AS matched) AS m
+        WHERE g.user_id = $1
+        ''',
+        user_id,
+        wildcard,
+        tags,
+    )
+
+
+def _merge(target: dict[str, Any], patch: dict[str, Any]) -> bool:
+    changed = any(key not in target or target[key] != value for key, value in patch.items())
+    target.update(patch)
+    return changed
+
+
+def apply_event(state: GameState, event: UpdateEvent) -> bool:
+    """Apply ``event`` to a save in place; mirrors ``compile_event``.
+
+    Returns whether the save changed.
+    """
+    if event.type == "location" and isinstance(event.msg, dict):
+        return _merge(state.location, location_patch(event.msg))
+
+    if event.type in ("problem", "minigame") and event.id:
+        return state.complete(f"completed_{event.type}s", event.id)
+
+    payload = _event_payload(event)
+
+    if event.type == "notebook" and isinstance(payload, dict):
+        return _merge(state.notebook, payload)
+
+    if event.type == "access" and isinstance(payload, dict):
+        return _merge(state.access, payload)
+
+    if event.type == "npc" and event.id and isinstance(payload, dict):
+        npc = state.npc(event.id)
+        if npc is not None:
+            if not isinstance(npc.get("state"), dict):
+                npc["state"] = {}
+            return _merge(npc["state"], payload)
+        state.add_npc(event.id, dict(payload))
+        return True
+
+    return False
+
+
+def coalesce_events(
+    events: list[UpdateEvent],
+) -> tuple[list[UpdateEvent | None], list[EventResult]]:
+    """Fold every location event of a batch into the last one.
+
+    Location is independent of the other sections, so only the merged fields
+    of the final position need to be applied. Returns the events to apply
+    (``None`` where an event was folded away or rejected) and the results
+    already known for those slots.
+    """
+    pending: list[UpdateEvent | None] = list(events)
+    results: list[EventResult] = []
+    merged: dict[str, Any] = {}
+    last_location: int | None = None
+
+    for index, event in enumerate(events):
+        if event.type != "location" or not isinstance(event.msg, dict):
+            continue
+        try:
+            merged.update(location_patch(event.msg))
+        except HTTPException as exc:
+            pending[index] = None
+            results.append(EventResult(index=index, ok=False, status="rejected", message=exc.detail))
+            continue
+        if last_location is not None:
+            pending[last_location] = None
+            results.append(EventResult(index=last_location, ok=True, status="coalesced"))
+        last_location = index
+
+    if last_location is not None:
+        pending[last_location] = UpdateEvent(type="location", msg=merged)
+
+    return pending, results
+
+
+def decode_save(game_data: Any) -> dict[str, Any]:
+    """Decode a stored save, filling missing sections like the SQL path does.
+
+    As in ``compile_event``, a section of the wrong type is replaced by an
+    empty one, and a document that is not an object by the default save.
+    """
+    data = orjson.loads(game_data) if isinstance(game_data, str) else game_data
+    default = orjson.loads(DEFAULT_SAVE_JSON)
+    if not isinstance(data, dict):
+        return default
+    doc = {**default, **data}
+    for section, value in default.items():
+        if not isinstance(doc[section], type(value)):
+            doc[section] = type(value)()
+    return doc
+
+
+def fold_save(game_data: Any, tail: str | None) -> dict[str, Any]:
+    """Decode a snapshot and apply the logged events in ``tail`` (a JSON array) to it."""
+    state = GameState.from_doc(decode_save(game_data))
+    for event in orjson.loads(tail or "[]"):
+        apply_event(state, UpdateEvent.model_validate(event))
+    return state.doc
+
+
+def _event_json(event: UpdateEvent) -> str:
+    if event.type == "location" and isinstance(event.msg, dict):
+        # Coerce and validate now; a logged event must always apply
+        event = UpdateEvent(type="location", msg=location_patch(event.msg))
+    return event.model_dump_json(exclude_none=True)
+
+
+async def append_events(
+    connection: asyncpg.Connection, user_id: int, events: list[UpdateEvent]
+) -> None:
+    """Append events to ``game_events`` in one insert, creating the default save on first write.
+
+    The snapshot in ``game_saves`` is left alone; the compactor folds the
+    events into it later.
+    """
+    if not events:
+        return
+    await connection.execute(
+        '''
+        WITH created AS (
+            INSERT INTO game_saves (user_id, game_data)
+            VALUES ($1, $2)
+            ON CONFLICT (user_id) DO NOTHING
+        )
+        INSERT INTO game_events (user_id, event)
+        SELECT $1, e FROM unnest($3::jsonb[]) WITH ORDINALITY AS u(e, ord)
+        ORDER BY ord
+        ''',
+        user_id,
+        DEFAULT_SAVE_JSON,
+        [_event_json(event) for event in events],
+    )
+
+
+async def _fetch_tail(
+    connection: asyncpg.Connection, user_id: int, after_event_id: int
+) -> asyncpg.Record:
+    """The ``last_id`` and JSON array ``events`` logged after ``after_event_id``."""
+    return await connection.fetchrow(
+        '''
+        SELECT max(event_id) AS last_id, jsonb_agg(event ORDER BY event_id)::text AS events
+        FROM game_events
+        WHERE user_id = $1 AND event_id > $2
+        ''',
+        user_id,
+        after_event_id,
+    )
+
+
+async def store_save(connection: asyncpg.Connection, user_id: int, json_data: str) -> str:
+    """Replace the user's save with ``json_data`` and return the new save tag.
+
+    With the event log enabled, events logged so far are superseded by the
+    full save and are marked as compacted.
+    """
+    if not settings.GAME_EVENT_LOG:
+        return await connection.fetchval(
+            f'''
+            INSERT INTO game_saves (user_id, game_data)
+            VALUES ($1, $2)
+            ON CONFLICT (user_id) DO UPDATE
+                SET game_data = EXCLUDED.game_data,
+                    version = game_saves.version + 1
+            RETURNING {_etag_sql("version")}
+            ''',
+            user_id,
+            json_data,
+        )
+
+    return await connection.fetchval(
+        f'''
+        INSERT INTO game_saves (user_id, game_data, last_event_id)
+        VALUES ($1, $2, (SELECT COALESCE(max(event_id), 0) FROM game_events WHERE user_id = $1))
+        ON CONFLICT (user_id) DO UPDATE
+            SET game_data = EXCLUDED.game_data,
+                version = game_saves.version + 1,
+                last_event_id = GREATEST(game_saves.last_event_id, EXCLUDED.last_event_id)
+        RETURNING {_etag_sql("version")}
+        ''',
+        user_id,
+        json_data,
+    )
+
+
+async def _lock_save(
+    connection: asyncpg.Connection, user_id: int, create: bool = True
+) -> asyncpg.Record | None:
+    """Lock the user's save row for the current transaction.
+
+    With ``create``, a missing save is first written with the default state,
+    so concurrent first writes lock the same row.
+    """
+    query = f"SELECT {_locked_columns()} FROM game_saves WHERE user_id = $1 FOR UPDATE"
+    row = await connection.fetchrow(query, user_id)
+    if row is None and create:
+        await connection.execute(
+            '''
+            INSERT INTO game_saves (user_id, game_data)
+            VALUES ($1, $2)
+            ON CONFLICT (user_id) DO NOTHING
+            ''',
+            user_id,
+            DEFAULT_SAVE_JSON,
+        )
+        row = await connection.fetchrow(query, user_id)
+    return row
+
+
+def _locked_columns() -> str:
+    return "version, game_data, last_event_id" if settings.GAME_EVENT_LOG else "version, game_data"
+
+
+async def apply_update_batch(
+    connection: asyncpg.Connection, user_id: int, events: list[UpdateEvent]
+) -> list[EventResult]:
+    """Apply ``events`` in order inside one transaction with a single write.
+
+    The save row is locked for the duration, so the read-modify-write cannot
+    interleave with other updates for the same user. With the event log
+    enabled the events are appended in one insert instead.
+    """
+    pending, results = coalesce_events(events)
+    changed = False
+
+    if settings.GAME_EVENT_LOG:
+        await append_events(connection, user_id, [event for event in pending if event is not None])
+        results.extend(
+            EventResult(index=index, ok=True, status="applied")
+            for index, event in enumerate(pending)
+            if event is not None
+        )
+        results.sort(key=lambda result: result.index)
+        return results
+
+    async with connection.transaction():
+        row = await _lock_save(connection, user_id)
+        state = GameState.from_doc(decode_save(row["game_data"]))
+
+        for index, event in enumerate(pending):
+            if event is None:
+                continue
+            applied = apply_event(state, event)
+            changed = changed or applied
+            results.append(
+                EventResult(index=index, ok=True, status="applied" if applied else "unchanged")
+            )
+
+        if changed:
+            await connection.execute(
+                "UPDATE game_saves SET game_data = $2, version = version + 1 WHERE user_id = $1",
+                user_id,
+                orjson.dumps(state.doc).decode(),
+            )
+
+    results.sort(key=lambda result: result.index)
+    return results
+
+
+async def patch_save(
+    connection: asyncpg.Connection,
+    user_id: int,
+    apply: Callable[[Any, Any], Any],
+    patch: Any,
+    if_match: str | None = None,
+) -> str:
+    """Apply ``patch`` with ``apply(state, patch)`` under a row lock and return the new save tag.
+
+    With ``if_match``, the patch only applies on top of one of the named
+    tags and fails with 412 otherwise. Without it, a missing save is
+    patched starting from the default state. Logged events not yet
+    compacted are folded in first.
+    """
+    async with connection.transaction():
+        row = await _lock_save(connection, user_id, create=not if_match)
+        tail = None
+        if row is not None:
+            tag = f"{user_id}-{row['version']}"
+            if settings.GAME_EVENT_LOG:
+                tail = await _fetch_tail(connection, user_id, row["last_event_id"])
+                last_event_id = tail["last_id"] or row["last_event_id"]
+                tag = f"{tag}.{last_event_id}"
+        if if_match:
+            wildcard, tags = parse_etags(if_match)
+            if row is None or not (wildcard or tag in tags):
+                raise HTTPException(
+                    status_code=status.HTTP_412_PRECONDITION_FAILED,
+                    detail="Save has changed since the given version",
+                )
+
+        state = apply(fold_save(row["game_data"], tail["events"] if tail else None), patch)
+        check_save_shape(state)
+        game_data = orjson.dumps(state)
+        enforce_save_limits(state, len(game_data))
+        if not settings.GAME_EVENT_LOG:
+            return await connection.fetchval(
+                f'''
+                UPDATE game_saves SET game_data = $2, version = version + 1
+                WHERE user_id = $1
+                RETURNING {_etag_sql("version")}
+                ''',
+                user_id,
+                game_data.decode(),
+            )
+        return await connection.fetchval(
+            f'''
+            UPDATE game_saves SET game_data = $2, version = version + 1, last_event_id = $3
+            WHERE user_id = $1
+            RETURNING {_etag_sql("version")}
+            ''',
+            user_id,
+            game_data.decode(),
+            last_event_id,
+        )
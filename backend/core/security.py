@@ -1,26 +1,103 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Callable, Optional
 from uuid import uuid4
 
 import jwt
-from passlib.context import CryptContext
+from fastapi import HTTPException, status
 
 from core.config import settings
 
-_pwd_context = CryptContext(
-    schemes=["pbkdf2_sha256"],
-    deprecated="auto",
-)
+_pwd_context: Any = None
+
+
+def _get_pwd_context() -> Any:
+    """Build the passlib context on first use; importing passlib is a visible part of app start time."""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(
+            schemes=["pbkdf2_sha256"],
+            deprecated="auto",
+        )
+    return _pwd_context
 
 
 def hash_password(password: str) -> str:
     """Generate a salted hash for the given password."""
-    return _pwd_context.hash(password)
+    return _get_pwd_context().hash(password)
 
 
 def verify_password(password: str, hashed_password: str) -> bool:
     """Verify a password against the stored salted hash."""
-    return _pwd_context.verify(password, hashed_password)
+    return _get_pwd_context().verify(password, hashed_password)
+
+
+_hash_executor: Optional[Executor] = None
+_hash_pending = 0
+
+
+def _get_hash_executor() -> Executor:
+    """Create the hashing worker pool on first use."""
+    global _hash_executor
+
+    if _hash_executor is None:
+        if settings.HASH_POOL_KIND == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=settings.HASH_POOL_SIZE)
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.HASH_POOL_SIZE,
+                thread_name_prefix="password-hash",
+            )
+    return _hash_executor
+
+
+def hash_queue_full() -> bool:
+    """Whether hashing work is already queued up to ``HASH_QUEUE_LIMIT``."""
+    return _hash_pending >= settings.HASH_QUEUE_LIMIT
+
+
+def hash_busy_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _run_in_hash_pool(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a hashing function off the event loop, rejecting work past the queue limit."""
+    global _hash_pending
+
+    if hash_queue_full():
+        raise hash_busy_error()
+
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password in the worker pool without blocking the event loop."""
+    return await _run_in_hash_pool(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """Verify a password in the worker pool without blocking the event loop."""
+    return await _run_in_hash_pool(verify_password, password, hashed_password)
+
+
+def shutdown_hash_executor() -> None:
+    """Stop the hashing worker pool."""
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=True)
+        _hash_executor = None
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -0,0 +1,46 @@
+import math
+import os
+
+from core.config import settings
+
+# Below this many connections per worker, its background tasks would queue
+# behind requests for the pool
+MIN_POOL_PER_WORKER = 2
+
+
+def available_cpus() -> int:
+    """CPUs this process may actually use: affinity mask, capped by a cgroup v2 quota."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        count = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def worker_count() -> int:
+    """Number of server workers: ``WEB_CONCURRENCY``, or one per available CPU.
+
+    Each worker is a single event loop, so one per core keeps every core busy
+    without oversubscribing. With ``DB_CONNECTION_BUDGET`` set, the count is
+    lowered until every worker gets at least ``MIN_POOL_PER_WORKER``
+    connections.
+    """
+    workers = settings.WEB_CONCURRENCY or available_cpus()
+    budget = settings.DB_CONNECTION_BUDGET
+    if budget is not None:
+        if budget < MIN_POOL_PER_WORKER:
+            raise RuntimeError(
+                f"DB_CONNECTION_BUDGET={budget} is too small; need at least {MIN_POOL_PER_WORKER}"
+            )
+        affordable = budget // MIN_POOL_PER_WORKER
+        if workers > affordable:
+            print(f"Reducing workers from {workers} to {affordable} to fit DB_CONNECTION_BUDGET={budget}")
+            workers = affordable
+    return max(1, workers)
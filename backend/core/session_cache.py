@@ -0,0 +1,85 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+from core.config import settings
+
+
+class SessionCache:
+    """Bounded LRU cache of validated sessions keyed by session_id.
+
+    Entries live for at most ``ttl`` seconds and never past the session's
+    ``time_expire``. The cache is per process, so a session revoked by another
+    worker stays usable here for at most ``ttl`` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple[int, float]]" = OrderedDict()
+
+    def get(self, session_id: str) -> Optional[int]:
+        """Return the cached user ID for a session, or None on a miss."""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        user_id, deadline = entry
+        if deadline <= time.monotonic():
+            del self._entries[session_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        return user_id
+
+    def set(self, session_id: str, user_id: int, time_expire: datetime) -> None:
+        """Cache a session that was just validated against the database."""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+
+        remaining = (time_expire - datetime.now(timezone.utc)).total_seconds()
+        lifetime = min(self.ttl, remaining)
+        if lifetime <= 0:
+            return
+
+        self._entries[session_id] = (user_id, time.monotonic() + lifetime)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop a single session from the cache."""
+        self._entries.pop(session_id, None)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached session that belongs to a user."""
+        stale = [sid for sid, (uid, _) in self._entries.items() if uid == user_id]
+        for session_id in stale:
+            del self._entries[session_id]
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+
+session_cache = SessionCache(
+    maxsize=settings.SESSION_CACHE_SIZE,
+    ttl=settings.SESSION_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,95 @@
+import asyncio
+from typing import Optional
+
+import asyncpg  # type: ignore[import]
+
+from core.config import settings
+from core.database import acquire_connection
+
+
+class SessionReaper:
+    """Deletes expired rows from ``session`` and related tables in the background.
+
+    Rows go in batches of ``SESSION_REAP_BATCH_SIZE``, each its own short
+    statement, so a large backlog never holds locks for long. Expired
+    sessions are already rejected by authentication; this only keeps the
+    tables from growing without bound.
+    """
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def _reap_table(
+        connection: asyncpg.Connection,
+        table: str,
+        batch_size: int,
+        key: str = "session_id",
+        condition: str = "time_expire < NOW()",
+    ) -> int:
+        deleted = 0
+        while True:
+            result = await connection.execute(
+                f'''
+                DELETE FROM {table}
+                WHERE {key} IN (
+                    SELECT {key} FROM {table}
+                    WHERE {condition}
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                )
+                ''',
+                batch_size,
+            )
+            count = int(result.split()[-1])
+            deleted += count
+            if count < batch_size:
+                return deleted
+
+    async def reap(self, connection: asyncpg.Connection, batch_size: Optional[int] = None) -> int:
+        """Delete all expired sessions and return how many were deleted."""
+        batch_size = batch_size or settings.SESSION_REAP_BATCH_SIZE
+        deleted = await self._reap_table(connection, "session", batch_size)
+        if settings.AUTH_MODE == "stateless":
+            # A revocation is moot once the token it revokes has expired
+            await self._reap_table(connection, "revoked_session", batch_size)
+        if settings.RATE_LIMIT_STORE == "postgres":
+            # An idle bucket refills completely; dropping it changes nothing
+            refill_seconds = max(
+                settings.RATE_LIMIT_IP_BURST * 60 / settings.RATE_LIMIT_IP_PER_MINUTE,
+                settings.RATE_LIMIT_EMAIL_BURST * 60 / settings.RATE_LIMIT_EMAIL_PER_MINUTE,
+            )
+            await self._reap_table(
+                connection,
+                "rate_limit_bucket",
+                batch_size,
+                key="key",
+                condition=f"updated_at < NOW() - make_interval(secs => {refill_seconds:.0f} + 1)",
+            )
+        return deleted
+
+    def start(self, interval: float) -> None:
+        """Start the periodic background reaping."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            try:
+                async with acquire_connection() as connection:
+                    await self.reap(connection)
+            except Exception as e:
+                print("Session reap error:", e)
+            await asyncio.sleep(interval)
+
+
+session_reaper = SessionReaper()
@@ -0,0 +1,65 @@
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+
+@dataclass(slots=True)
+class GameState:
+    """Working copy of a decoded save for applying update events in Python.
+
+    The sections alias into ``doc``, so edits through them are edits to the
+    document that gets written back; unknown top-level keys are kept as is.
+    Completion logs and NPCs get hash indexes, built on first use, so
+    membership checks do not scan lists. Validation happens at the API
+    boundary; stored sections of the wrong type are emptied by
+    ``decode_save`` and the completion log and NPC entries are checked
+    as they are used.
+    """
+
+    doc: dict[str, Any]
+    location: dict[str, Any]
+    notebook: dict[str, Any]
+    access: dict[str, Any]
+    npcs: list[dict[str, Any]]
+    _completed: dict[str, set[str]] = field(default_factory=dict)
+    _npc_index: Optional[dict[str, dict[str, Any]]] = None
+
+    @classmethod
+    def from_doc(cls, doc: dict[str, Any]) -> "GameState":
+        """Wrap a decoded save that already has every section (see ``decode_save``)."""
+        return cls(
+            doc=doc,
+            location=doc["location"],
+            notebook=doc["notebook"],
+            access=doc["access"],
+            npcs=doc["npc"],
+        )
+
+    def complete(self, key: str, item: str) -> bool:
+        """Append ``item`` to the ``notebook[key]`` log unless present; returns whether it was added."""
+        seen = self._completed.get(key)
+        if seen is None:
+            log = self.notebook.get(key)
+            if not isinstance(log, list):
+                # A log of the wrong type counts as empty, as in compile_event
+                log = self.notebook[key] = []
+            seen = self._completed[key] = {entry for entry in log if isinstance(entry, str)}
+        if item in seen:
+            return False
+        seen.add(item)
+        self.notebook[key].append(item)
+        return True
+
+    def npc(self, npc_id: str) -> Optional[dict[str, Any]]:
+        if self._npc_index is None:
+            self._npc_index = {}
+            for npc in self.npcs:
+                if isinstance(npc, dict) and isinstance(npc.get("id"), str):
+                    # Duplicate ids: the first entry is the one updated
+                    self._npc_index.setdefault(npc["id"], npc)
+        return self._npc_index.get(npc_id)
+
+    def add_npc(self, npc_id: str, state: dict[str, Any]) -> None:
+        npc = {"id": npc_id, "state": state}
+        self.npcs.append(npc)
+        if self._npc_index is not None:
+            self._npc_index[npc_id] = npc
@@ -0,0 +1,104 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from core.config import settings
+from core.database import acquire_connection
+from core.saves import apply_update_batch, apply_update_event, location_patch
+from models.update import UpdateEvent
+
+
+class _UserWrites:
+    __slots__ = ("lock", "users", "pending", "drain")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        # Holders and waiters of ``lock`` plus queued events; the entry is
+        # dropped when this reaches zero
+        self.users = 0
+        self.pending: list[tuple[UpdateEvent, asyncio.Future]] = []
+        self.drain: Optional[asyncio.Task] = None
+
+
+class WriteCoordinator:
+    """Serializes save writes per user within this worker.
+
+    Writes for one user run one at a time, while different users proceed in
+    parallel. Entries exist only while a user has writes in flight, so memory
+    is bounded by the number of concurrently writing users. Single update
+    events queue up behind the write in progress and are then applied
+    together in one database write.
+
+    Row locks in the SQL still order writes coming from different workers;
+    this keeps a worker's own requests from queueing on them.
+    """
+
+    def __init__(self) -> None:
+        self._users: dict[int, _UserWrites] = {}
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def _enter(self, user_id: int) -> _UserWrites:
+        entry = self._users.get(user_id)
+        if entry is None:
+            entry = self._users[user_id] = _UserWrites()
+        entry.users += 1
+        return entry
+
+    def _leave(self, user_id: int, entry: _UserWrites) -> None:
+        entry.users -= 1
+        if entry.users == 0:
+            del self._users[user_id]
+
+    @asynccontextmanager
+    async def lock(self, user_id: int) -> AsyncIterator[None]:
+        """Hold the user's write lock for the duration of the block."""
+        entry = self._enter(user_id)
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            self._leave(user_id, entry)
+
+    async def submit(self, user_id: int, event: UpdateEvent) -> None:
+        """Apply one update event, merged with whatever else is queued for the user."""
+        if event.type == "location" and isinstance(event.msg, dict):
+            # Reject invalid coordinates here, not inside a merged write
+            location_patch(event.msg)
+
+        entry = self._enter(user_id)
+        future = asyncio.get_running_loop().create_future()
+        entry.pending.append((event, future))
+        if entry.drain is None:
+            # A task of its own, so a cancelled request cannot strand the queue
+            entry.drain = asyncio.create_task(self._drain(user_id, entry))
+        await future
+
+    async def _drain(self, user_id: int, entry: _UserWrites) -> None:
+        try:
+            async with entry.lock:
+                while entry.pending:
+                    limit = settings.UPDATE_BATCH_MAX_EVENTS if settings.UPDATE_COALESCE else 1
+                    batch, entry.pending = entry.pending[:limit], entry.pending[limit:]
+                    try:
+                        async with acquire_connection() as connection:
+                            if len(batch) == 1:
+                                await apply_update_event(connection, user_id, batch[0][0])
+                            else:
+                                await apply_update_batch(connection, user_id, [event for event, _ in batch])
+                    except Exception as exc:
+                        for _, future in batch:
+                            if not future.done():
+                                future.set_exception(exc)
+                    else:
+                        for _, future in batch:
+                            if not future.done():
+                                future.set_result(None)
+                    for _ in batch:
+                        self._leave(user_id, entry)
+        finally:
+            entry.drain = None
+
+
+write_coordinator = WriteCoordinator()
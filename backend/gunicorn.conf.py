@@ -0,0 +1,64 @@
+# Production server settings, read by gunicorn from the working directory:
+#
+#     gunicorn main:app
+#
+# Workers are sized from the CPUs available to the container and each gets an
+# equal share of DB_CONNECTION_BUDGET for its pool (see core/server.py).
+import os
+import shutil
+import tempfile
+
+from core.config import settings
+from core.database import pool_max_size
+from core.metrics import mark_process_dead, prepare_multiproc_dir
+from core.server import worker_count
+
+workers = worker_count()
+# Workers fork from this process, so they all size their pools for this count
+settings.WEB_CONCURRENCY = workers
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = settings.SERVER_BIND
+
+# Proxies whose X-Forwarded-For / X-Forwarded-Proto are trusted; the worker
+# then sees the real client IP (rate limiting) and scheme. Use "*" when the
+# app is only reachable through the front end, e.g. Azure App Service.
+forwarded_allow_ips = settings.FORWARDED_ALLOW_IPS
+
+# Importing main creates no connections, threads or event loop state, so the
+# app can be loaded once and shared by the forked workers. New code then
+# needs a full restart (or USR2), not a HUP.
+preload_app = settings.SERVER_PRELOAD
+
+# HUP and SIGTERM let in-flight requests finish and run the lifespan
+# shutdown (buffer flush, compaction) before a worker exits
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+timeout = settings.SERVER_GRACEFUL_TIMEOUT_SECONDS + 30
+
+# Optional periodic worker recycling, staggered so workers do not restart together
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS // 10
+
+
+# Each worker counts its own requests; /metrics sums the snapshots they
+# publish here. Without a configured directory, one is made for this master.
+_own_metrics_dir = not settings.METRICS_MULTIPROC_DIR
+if _own_metrics_dir:
+    settings.METRICS_MULTIPROC_DIR = os.path.join(tempfile.gettempdir(), f"math-mystery-metrics-{os.getpid()}")
+    os.environ["METRICS_MULTIPROC_DIR"] = settings.METRICS_MULTIPROC_DIR
+
+
+def on_starting(server):
+    server.log.info("Starting %d workers, up to %d DB connections each", workers, pool_max_size())
+    prepare_multiproc_dir(settings.METRICS_MULTIPROC_DIR)
+
+
+def child_exit(server, worker):
+    # Keeps the worker's counters in the totals, without its gauges
+    mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if _own_metrics_dir:
+        shutil.rmtree(settings.METRICS_MULTIPROC_DIR, ignore_errors=True)
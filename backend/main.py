@@ -1,9 +1,18 @@
 # backend/api/main.py
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from core.config import settings
-from core.database import close_db_pool, init_db_pool
+from core.database import acquire_connection, close_db_pool, init_db_pool, init_replica_pools, register_connection_init
+from core.event_log import event_compactor
+from core.health import health_checker
+from core.location_buffer import location_buffer
+from core.migrations import apply_migrations, verify_schema
+from core.metrics import MetricsMiddleware, install_query_timing, run_snapshot_writer, write_snapshot
+from core.revocation import revocation_list
+from core.security import shutdown_hash_executor
+from core.session_reaper import session_reaper
 from routers.health import health_router
 
 from routers.register import register_router
@@ -14,13 +23,85 @@ from routers.delete import delete_router
 from routers.sync import game_sync_router
 from routers.update import game_update_router
 from routers.save import game_save_router
+from routers.ws import game_ws_router
+from routers.metrics import metrics_router
+
+register_connection_init(install_query_timing)
+
+
+def _startup_needs_db() -> bool:
+    """Whether the lifespan itself queries the database before serving."""
+    return settings.DB_MIGRATE_ON_STARTUP or settings.DB_VERIFY_SCHEMA or settings.AUTH_MODE == "stateless"
+
+
+async def _warm_up_pool() -> None:
+    try:
+        await init_db_pool()
+    except Exception as e:
+        # Retried by the first request that needs a connection
+        print("Pool warm-up error:", e)
+
+
+async def _start_replica_pools() -> None:
+    try:
+        await init_replica_pools()
+    except Exception as e:
+        # Reads use the primary; the health checker retries
+        print("Replica pool error:", e)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_db_pool()
+    warmup_task = None
+    if settings.DB_POOL_WARMUP_IN_BACKGROUND and not _startup_needs_db():
+        # Serve right away; requests that need the database wait for the pool
+        warmup_task = asyncio.create_task(_warm_up_pool())
+    else:
+        await init_db_pool()
+    replica_task = None
+    if settings.DB_REPLICA_URLS:
+        # Replicas are optional for serving, so a slow one never delays startup
+        replica_task = asyncio.create_task(_start_replica_pools())
+    if settings.DB_MIGRATE_ON_STARTUP or settings.DB_VERIFY_SCHEMA:
+        async with acquire_connection() as connection:
+            if settings.DB_MIGRATE_ON_STARTUP:
+                await apply_migrations(connection)
+            if settings.DB_VERIFY_SCHEMA:
+                # Refuse to serve with indexes missing rather than fall back to table scans
+                await verify_schema(connection)
+    if settings.AUTH_MODE == "stateless":
+        await revocation_list.start(acquire_connection, settings.REVOCATION_REFRESH_INTERVAL_SECONDS)
+    if settings.LOCATION_WRITE_BEHIND:
+        location_buffer.start(settings.LOCATION_FLUSH_INTERVAL_SECONDS)
+    if settings.SESSION_REAP_INTERVAL_SECONDS > 0:
+        session_reaper.start(settings.SESSION_REAP_INTERVAL_SECONDS)
+    if settings.GAME_EVENT_LOG:
+        event_compactor.start(settings.GAME_EVENT_COMPACT_INTERVAL_SECONDS)
+    if settings.HEALTH_CHECK_INTERVAL_SECONDS > 0:
+        health_checker.start(settings.HEALTH_CHECK_INTERVAL_SECONDS)
+    snapshot_task = None
+    if settings.METRICS_MULTIPROC_DIR:
+        snapshot_task = asyncio.create_task(
+            run_snapshot_writer(settings.METRICS_SNAPSHOT_INTERVAL_SECONDS)
+        )
     yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if replica_task is not None:
+        replica_task.cancel()
+    if snapshot_task is not None:
+        snapshot_task.cancel()
+    await health_checker.stop()
+    await session_reaper.stop()
+    await revocation_list.stop()
+    await location_buffer.stop()
+    # After the buffer, so its last location events get compacted too
+    await event_compactor.stop()
+    if settings.METRICS_MULTIPROC_DIR:
+        # Final counters so the other workers keep counting this one's requests
+        write_snapshot()
     await close_db_pool()
+    shutdown_hash_executor()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -35,6 +116,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(health_router)
 # app.include_router(user_router)
@@ -46,6 +128,8 @@ app.include_router(delete_router)
 app.include_router(game_update_router)
 app.include_router(game_save_router)
 app.include_router(game_sync_router)
+app.include_router(game_ws_router)
+app.include_router(metrics_router)
 
 
 
@@ -0,0 +1,49 @@
+-- Tables the backend reads and writes. IF NOT EXISTS, so databases created
+-- by hand before migrations existed can be brought under version control.
+CREATE TABLE IF NOT EXISTS users (
+    user_id SERIAL PRIMARY KEY,
+    email TEXT UNIQUE NOT NULL,
+    password TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS session (
+    user_id INT NOT NULL,
+    session_id TEXT NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    time_expire TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id)
+);
+
+-- AUTH_MODE=stateless
+CREATE TABLE IF NOT EXISTS revoked_session (
+    session_id TEXT PRIMARY KEY,
+    user_id INT NOT NULL,
+    time_expire TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT clock_timestamp()
+);
+CREATE INDEX IF NOT EXISTS revoked_session_revoked_at_idx ON revoked_session (revoked_at);
+
+CREATE TABLE IF NOT EXISTS game_saves (
+    user_id INT PRIMARY KEY,
+    game_data JSONB,
+    version BIGINT NOT NULL DEFAULT 1,
+    last_event_id BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+-- Columns added after the table was first created by hand
+ALTER TABLE game_saves ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 1;
+ALTER TABLE game_saves ADD COLUMN IF NOT EXISTS last_event_id BIGINT NOT NULL DEFAULT 0;
+
+-- GAME_EVENT_LOG
+CREATE TABLE IF NOT EXISTS game_events (
+    event_id BIGSERIAL PRIMARY KEY,
+    user_id INT NOT NULL,
+    event JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS game_events_user_id_event_id_idx ON game_events (user_id, event_id);
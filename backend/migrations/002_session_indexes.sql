@@ -0,0 +1,5 @@
+-- Login, logout and /delete end a user's sessions by user_id
+CREATE INDEX IF NOT EXISTS session_user_id_idx ON session (user_id);
+
+-- The session reaper finds expired rows by time_expire
+CREATE INDEX IF NOT EXISTS session_time_expire_idx ON session (time_expire);
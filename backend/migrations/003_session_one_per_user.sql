@@ -0,0 +1,12 @@
+-- One session per user, so login can replace it with a single upsert.
+-- Keep only the latest session of users who somehow have several.
+DELETE FROM session AS s
+USING session AS newer
+WHERE newer.user_id = s.user_id
+  AND (COALESCE(newer.time_expire, '-infinity'), newer.session_id)
+      > (COALESCE(s.time_expire, '-infinity'), s.session_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS session_user_id_key ON session (user_id);
+
+-- Covered by the unique index
+DROP INDEX IF EXISTS session_user_id_idx;
@@ -0,0 +1,9 @@
+-- Token buckets for RATE_LIMIT_STORE=postgres. Unlogged: losing them in a
+-- crash only resets the limits.
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_bucket (
+    key TEXT PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    allowed BOOLEAN NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rate_limit_bucket_updated_at_idx ON rate_limit_bucket (updated_at);
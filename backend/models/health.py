@@ -1,5 +1,21 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 class HealthResponse(BaseModel):
     ok: bool
     db_status: str
+
+class LivenessResponse(BaseModel):
+    ok: bool
+
+class ReadinessResponse(BaseModel):
+    ok: bool
+    db_status: str
+    pool_in_use: int
+    pool_max_size: int
+    pool_waiting: int
+    replication_lag_seconds: Optional[float]
+    replicas_available: int
+    checked_seconds_ago: Optional[float]
+    reasons: list[str]
@@ -1,9 +1,21 @@
 # models/update.py
 from pydantic import BaseModel
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, List, Literal
 
 class UpdateEvent(BaseModel):
     type: Literal["problem","minigame","location","notebook","access","npc"]
     id: Optional[str] = None
     msg: Optional[Dict[str, Any]] = None   
     value: Optional[Dict[str, Any]] = None
+
+class EventResult(BaseModel):
+    index: int
+    ok: bool
+    # applied: changed the save; unchanged: already in that state;
+    # coalesced: superseded by a later event in the batch; rejected: invalid event
+    status: Literal["applied", "unchanged", "coalesced", "rejected"]
+    message: Optional[str] = None
+
+class BatchUpdateResponse(BaseModel):
+    ok: bool
+    results: List[EventResult]
@@ -2,8 +2,13 @@ import asyncpg  # type: ignore[import]
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 
-from core.database import get_db_connection
-from core.security import verify_password
+from core.config import settings
+from core.database import acquire_connection
+from core.rate_limit import auth_rate_limit
+from core.security import verify_password_async
+from core.location_buffer import location_buffer
+from core.revocation import end_user_sessions
+from core.write_coordinator import write_coordinator
 from models.delete import DeleteRequest, DeleteResponse
 
 delete_router = APIRouter()
@@ -12,17 +17,18 @@ delete_router = APIRouter()
 @delete_router.delete(
     "/delete",
     tags=["delete"],
+    dependencies=[Depends(auth_rate_limit)],
     response_model=DeleteResponse,
 )
 async def handle_deletion_request(
     payload: DeleteRequest,
-    connection: asyncpg.Connection = Depends(get_db_connection),
 ) -> DeleteResponse:
     """Delete a user account after verifying credentials."""
-    record = await connection.fetchrow(
-        "SELECT user_id, password FROM users WHERE email = $1",
-        payload.email,
-    )
+    async with acquire_connection() as connection:
+        record = await connection.fetchrow(
+            "SELECT user_id, password FROM users WHERE email = $1",
+            payload.email,
+        )
     if record is None:
         return JSONResponse(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -30,7 +36,7 @@ async def handle_deletion_request(
         )
 
     stored_hash = record["password"]
-    if not verify_password(payload.password, stored_hash):
+    if not await verify_password_async(payload.password, stored_hash):
         return JSONResponse(
             status_code=status.HTTP_401_UNAUTHORIZED,
             content={"ok": False, "message": "Invalid email or password"},
@@ -39,18 +45,24 @@ async def handle_deletion_request(
     user_id = record["user_id"]
 
     try:
-        async with connection.transaction():
-            # Delete sessions first (foreign key constraint usually handles this, but good to be explicit or if cascade isn't set)
-            # Assuming CASCADE on delete in DB, but if not:
-            # Delete sessions first
-            await connection.execute("DELETE FROM session WHERE user_id = $1", user_id)
-            
-            # Delete game saves
-            await connection.execute("DELETE FROM game_saves WHERE user_id = $1", user_id)
-            
-            # Delete user
-            await connection.execute("DELETE FROM users WHERE user_id = $1", user_id)
-            
+        # Under the user's write lock, taken before the connection like every
+        # other save write, so no update lands between the discard and the delete
+        async with write_coordinator.lock(user_id):
+            await location_buffer.drop(user_id)
+            async with acquire_connection() as connection, connection.transaction():
+                # Delete sessions first (foreign key constraint usually handles this, but good to be explicit or if cascade isn't set)
+                # Assuming CASCADE on delete in DB, but if not:
+                # Delete sessions first
+                await end_user_sessions(connection, user_id)
+
+                # Delete game saves
+                await connection.execute("DELETE FROM game_saves WHERE user_id = $1", user_id)
+                if settings.GAME_EVENT_LOG:
+                    await connection.execute("DELETE FROM game_events WHERE user_id = $1", user_id)
+
+                # Delete user
+                await connection.execute("DELETE FROM users WHERE user_id = $1", user_id)
+
     except asyncpg.PostgresError as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,20 +1,35 @@
 # backend/api/routers/health.py
-from fastapi import APIRouter, Depends, Response, status
-import asyncpg
-from core.database import get_db_connection
-from models.health import HealthResponse
+from fastapi import APIRouter, Request, Response, status
+from fastapi.responses import JSONResponse
+from core.health import health_checker
+from models.health import HealthResponse, LivenessResponse, ReadinessResponse
 
 health_router = APIRouter(tags=["health"])
 
 @health_router.api_route("/health", methods=["GET", "HEAD"], response_model=HealthResponse)
-async def health_check(
-    connection: asyncpg.Connection = Depends(get_db_connection),
-):
-    try:
-        await connection.execute("SELECT 1")
-        db_status = "connected"
-    except Exception:
-        db_status = "disconnected"
-        # Optionally return 503 if DB is down, but often 200 with status details is preferred for "app is up"
-    
-    return HealthResponse(ok=True, db_status=db_status)
+async def health_check(request: Request):
+    if request.method == "HEAD":
+        # HEAD never reported the database state, so it answers without
+        # waiting for a pool connection (e.g. while the pool warms up)
+        return Response(status_code=status.HTTP_200_OK)
+
+    if health_checker.checked_at is None:
+        # Checker not running (or not run yet): probe once, which also fills the cache
+        await health_checker.check()
+    # Always 200 with status details: this endpoint reports "app is up"
+    return HealthResponse(ok=True, db_status=health_checker.db_status)
+
+
+@health_router.api_route("/health/live", methods=["GET", "HEAD"], response_model=LivenessResponse)
+async def liveness_check():
+    """The process is serving requests; no I/O."""
+    return LivenessResponse(ok=True)
+
+
+@health_router.api_route("/health/ready", methods=["GET", "HEAD"], response_model=ReadinessResponse)
+async def readiness_check():
+    """Whether this worker should get traffic, from the cached background check."""
+    readiness = health_checker.readiness()
+    if not readiness["ok"]:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=readiness)
+    return ReadinessResponse(**readiness)
@@ -6,7 +6,9 @@ from fastapi.responses import JSONResponse
 
 from core.config import settings
 from core.database import get_db_connection
-from core.security import create_access_token, generate_session_id, verify_password
+from core.rate_limit import auth_rate_limit
+from core.security import create_access_token, generate_session_id, verify_password_async
+from core.revocation import replace_user_session
 from models.login import LoginRequest, LoginResponse
 
 login_router = APIRouter()
@@ -15,6 +17,7 @@ login_router = APIRouter()
 @login_router.post(
     "/login",
     tags=["login"],
+    dependencies=[Depends(auth_rate_limit)],
     response_model=LoginResponse,
 )
 async def handle_login_request(
@@ -34,7 +37,7 @@ async def handle_login_request(
         )
 
     stored_hash = record["password"]
-    if not verify_password(payload.password, stored_hash):
+    if not await verify_password_async(payload.password, stored_hash):
         return JSONResponse(
             status_code=status.HTTP_401_UNAUTHORIZED,
             content={"ok": False, "message": "Invalid email or password"},
@@ -52,19 +55,8 @@ async def handle_login_request(
 
     # Save session to DB
     try:
-        # Enforce single session: Delete existing sessions for this user
-        await connection.execute(
-            "DELETE FROM session WHERE user_id = $1",
-            user_id,
-        )
-        await connection.execute(
-            """
-            INSERT INTO session (user_id, session_id, time_expire)
-            VALUES ($1, $2, NOW() + interval '30 minutes')
-            """,
-            user_id,
-            session_id,
-        )
+        # Enforce single session: replaces any existing session of this user
+        await replace_user_session(connection, user_id, session_id)
     except asyncpg.PostgresError as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
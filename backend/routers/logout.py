@@ -3,6 +3,8 @@ from fastapi.responses import JSONResponse
 import asyncpg  # type: ignore[import]
 
 from core.database import get_db_connection, get_current_user
+from core.location_buffer import location_buffer
+from core.revocation import end_user_sessions
 
 logout_router = APIRouter()
 
@@ -26,10 +28,9 @@ async def handle_logout(
     # For logout, we should probably just invalidate the current session or all. 
     # Let's delete all sessions for this user to ensure clean logout.
     
-    await connection.execute(
-        "DELETE FROM session WHERE user_id = $1",
-        user_id,
-    )
+    await location_buffer.flush_user(connection, user_id)
+
+    await end_user_sessions(connection, user_id)
 
     response.delete_cookie(key="access_token")
     
@@ -0,0 +1,49 @@
+# backend/api/routers/metrics.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.database import get_pool_stats
+from core.location_buffer import location_buffer
+from core.metrics import aggregate, collect_snapshots, registry, render_prometheus
+from core.session_cache import session_cache
+
+metrics_router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def runtime_gauges() -> dict[str, float]:
+    """Pool, session cache and write-behind state of this worker."""
+    pool = get_pool_stats()
+    return {
+        "db_pool_size": pool["size"],
+        "db_pool_in_use": pool["in_use"],
+        "db_pool_idle": pool["idle"],
+        "db_pool_waiting": pool["waiting"],
+        "session_cache_size": session_cache.stats()["size"],
+        "location_buffer_pending": len(location_buffer),
+    }
+
+
+def runtime_counters() -> dict[str, float]:
+    """Cumulative pool and session cache counts of this worker."""
+    pool = get_pool_stats()
+    cache = session_cache.stats()
+    return {
+        "db_pool_acquires_total": pool["acquires"],
+        "db_pool_acquire_timeouts_total": pool["acquire_timeouts"],
+        "db_pool_acquire_wait_seconds_total": pool["acquire_wait_seconds_total"],
+        "session_cache_hits_total": cache["hits"],
+        "session_cache_misses_total": cache["misses"],
+    }
+
+
+registry.gauge_sources.append(runtime_gauges)
+registry.counter_sources.append(runtime_counters)
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition, aggregated across workers when configured."""
+    body = render_prometheus(aggregate(collect_snapshots()))
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
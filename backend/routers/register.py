@@ -3,7 +3,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 
 from core.database import get_db_connection
-from core.security import hash_password
+from core.rate_limit import auth_rate_limit
+from core.security import hash_password_async
 from models.register import RegisterRequest, RegisterResponse
 
 register_router = APIRouter()
@@ -12,6 +13,7 @@ register_router = APIRouter()
 @register_router.post(
     "/register",
     tags=["register"],
+    dependencies=[Depends(auth_rate_limit)],
     response_model=RegisterResponse,
 )
 async def handle_reg_request(
@@ -29,7 +31,7 @@ async def handle_reg_request(
             content={"ok": False, "message": "Email already in use"},
         )
 
-    password_hash = hash_password(payload.password)
+    password_hash = await hash_password_async(payload.password)
     try:
         await connection.execute(
             """
@@ -1,18 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from typing import Any
-import asyncpg  # type: ignore[import]
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 import json
-from models.save import OkResponse, SaveState, Location, Npc
-from core.database import get_db_connection, get_current_user
+import orjson
+from models.save import OkResponse, SaveRequest, SaveState, Location, Npc
+from core.compression import read_body
+from core.config import settings
+from core.database import acquire_connection, get_current_user
+from core.location_buffer import location_buffer
+from core.read_routing import read_router
+from core.patch import (
+    JSON_PATCH_CONTENT_TYPE,
+    MERGE_PATCH_CONTENT_TYPE,
+    PatchError,
+    PatchTestFailed,
+    apply_json_patch,
+    apply_merge_patch,
+)
+from core.saves import check_save_shape, enforce_save_limits, format_etag, patch_save, store_save
+from core.write_coordinator import write_coordinator
 
 game_save_router = APIRouter(tags=["game"])
 
-@game_save_router.post("/game/save", response_model=OkResponse)
+# The body is read raw, so document its schema by hand
+SAVE_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": SaveRequest.model_json_schema()},
+            MERGE_PATCH_CONTENT_TYPE: {"schema": {"type": "object"}},
+            JSON_PATCH_CONTENT_TYPE: {"schema": {"type": "array", "items": {"type": "object"}}},
+        },
+    }
+}
+
+@game_save_router.post("/game/save", response_model=OkResponse, openapi_extra=SAVE_REQUEST_BODY)
 async def handle_game_save(
-    payload: Any = Body(...),
+    request: Request,
+    response: Response,
     user_id: int = Depends(get_current_user),
-    connection: asyncpg.Connection = Depends(get_db_connection)
+    if_match: str | None = Header(default=None),
 ):
+    """Store the full save, or apply a merge patch / JSON Patch to it.
+
+    The body type is chosen by ``Content-Type``. Patches may name the version
+    they were made against in ``If-Match``; the new version is returned as
+    the ``ETag``.
+    """
+    # Size limits are enforced while the (possibly compressed) body streams in
+    body = await read_body(request, settings.SAVE_MAX_BYTES)
+    # Parse once to validate; the raw text is what gets stored
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Request body must be valid JSON",
+        )
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in (MERGE_PATCH_CONTENT_TYPE, JSON_PATCH_CONTENT_TYPE):
+        apply = apply_merge_patch if content_type == MERGE_PATCH_CONTENT_TYPE else apply_json_patch
+        try:
+            # Lock before taking a connection, in the same order as the update
+            # drain, so the two never wait on each other
+            async with write_coordinator.lock(user_id), acquire_connection() as connection:
+                await location_buffer.flush_user(connection, user_id)
+                tag = await patch_save(connection, user_id, apply, payload, if_match)
+        except PatchTestFailed as exc:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+        except PatchError as exc:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+        read_router.note_write(user_id, response)
+        response.headers["ETag"] = format_etag(tag)
+        return OkResponse(ok=True)
+
     if payload is None or payload == {}:
         # empty JSON; prob new user, so should create new JSON?
         state = SaveState(
@@ -23,26 +83,17 @@ async def handle_game_save(
         )
         json_data = json.dumps(state.model_dump())
     else:
-        # non-empty JSON; just read it
-        try:
-            json_data = json.dumps(payload)
-        except Exception as e:
-            print("JSON save data error:", e)
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to save game data"
-            )
+        # non-empty JSON; pass the validated text through
+        check_save_shape(payload)
+        enforce_save_limits(payload, len(body))
+        json_data = body.decode()
     try:
-        await connection.execute(
-            '''
-            INSERT INTO game_saves (user_id, game_data)
-            VALUES ($1, $2)
-            ON CONFLICT (user_id) DO UPDATE
-                SET game_data = EXCLUDED.game_data
-            ''',
-            user_id,
-            json_data
-        )
+        async with write_coordinator.lock(user_id), acquire_connection() as connection:
+            await location_buffer.flush_user(connection, user_id)
+            tag = await store_save(connection, user_id, json_data)
+    except HTTPException:
+        # e.g. 503 when no pool connection frees up
+        raise
     except Exception as e:
         print("DB error:", e)
         raise HTTPException(
@@ -50,4 +101,6 @@ async def handle_game_save(
             detail="Failed to save game data"
         )
     
-    return OkResponse(ok=True)
\ No newline at end of file
+    read_router.note_write(user_id, response)
+    response.headers["ETag"] = format_etag(tag)
+    return OkResponse(ok=True)
@@ -1,31 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 import asyncpg  # type: ignore[import]
-import json
-from core.database import get_db_connection, get_current_user
+from core.compression import encode_response_body
+from core.database import get_current_user
+from core.read_routing import get_read_connection
+from core.saves import fetch_save_if_none_match, format_etag, save_json
 from models.sync import SyncResponse
 
 game_sync_router = APIRouter(tags=["game"])
 
-@game_sync_router.get("/game/sync")
+# Clients may keep the document but must revalidate it with the ETag each time
+SYNC_CACHE_CONTROL = "private, no-cache"
+
+@game_sync_router.get("/game/sync", responses={200: {"model": SyncResponse}})
 async def handle_data_sync(
     user_id: int = Depends(get_current_user),
-    connection: asyncpg.Connection = Depends(get_db_connection)
+    # A replica, unless the user wrote recently or has a buffered location
+    # (which is then written to the primary first)
+    connection: asyncpg.Connection = Depends(get_read_connection),
+    if_none_match: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
 ):
-    row = await connection.fetchrow(
-        "SELECT game_data FROM game_saves WHERE user_id = $1",
-        user_id,
-    )
+    row = await fetch_save_if_none_match(connection, user_id, if_none_match)
 
-    if row is None or row["game_data"] is None:
+    if row is None or (row["game_data"] is None and not row["not_modified"]):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Game data not found",
         )
+
+    headers = {
+        "ETag": format_etag(row["etag"]),
+        "Cache-Control": SYNC_CACHE_CONTROL,
+        # Same URL for every account; a shared browser cache must not mix them
+        "Vary": "Accept-Encoding, Cookie",
+    }
+    if row["not_modified"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
         
-    game_data_json = row["game_data"]
-    if isinstance(game_data_json, str):
-        game_data = json.loads(game_data_json)
-    else:
-        game_data = game_data_json
+    # jsonb arrives as JSON text and is sent as is, unless logged events
+    # still need to be folded into the snapshot
+    content = save_json(row["game_data"], row["tail"]).encode()
 
-    return game_data
+    content, encoding = await encode_response_body(content, accept_encoding)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=content, media_type="application/json", headers=headers)
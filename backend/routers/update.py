@@ -1,66 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-import asyncpg  # type: ignore[import]
-import json
-from models.save import OkResponse, SaveState, Location, Npc
-from models.update import UpdateEvent
-from core.database import get_db_connection, get_current_user
+from typing import List
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
+from models.save import OkResponse
+from models.update import BatchUpdateResponse, UpdateEvent
+from core.config import settings
+from core.database import acquire_connection, get_current_user
+from core.location_buffer import location_buffer
+from core.read_routing import read_router
+from core.saves import apply_update_batch
+from core.write_coordinator import write_coordinator
 
 game_update_router = APIRouter(tags=["game"])
 
 @game_update_router.put("/game/update", response_model=OkResponse)
 async def game_update(
     event: UpdateEvent,
+    response: Response,
     user_id: int = Depends(get_current_user),
-    connection: asyncpg.Connection = Depends(get_db_connection)
 ):
-    # 1. Fetch current state
-    row = await connection.fetchrow(
-        "SELECT game_data FROM game_saves WHERE user_id = $1",
-        user_id,
-    )
-    
-    if row is None or row["game_data"] is None:
-        # If no save exists, we might want to create a default one or error.
-        # For update, it implies a session exists.
-        # Let's create default state if missing, similar to repo.saves.get_save
-        state = SaveState(
-            location=Location(room="Start", x=0, y=0),
-            notebook={},
-            access={},
-            npc=[Npc(id="npc1"), Npc(id="npc2")]
+    # The window starts now; a buffered location is flushed well within it
+    read_router.note_write(user_id, response)
+    if location_buffer.offer(user_id, event):
+        # Buffered; written in bulk by the background flush without a pool acquire
+        return OkResponse(ok=True)
+
+    # Applied by Postgres in one statement, together with any events of the
+    # same user that queued up meanwhile
+    await write_coordinator.submit(user_id, event)
+
+    return OkResponse(ok=True)
+
+
+@game_update_router.put("/game/update/batch", response_model=BatchUpdateResponse)
+async def game_update_batch(
+    response: Response,
+    events: List[UpdateEvent] = Body(...),
+    user_id: int = Depends(get_current_user),
+):
+    if len(events) > settings.UPDATE_BATCH_MAX_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.UPDATE_BATCH_MAX_EVENTS} events per batch",
         )
-    else:
-        game_data_json = row["game_data"]
-        if isinstance(game_data_json, str):
-            data_dict = json.loads(game_data_json)
-        else:
-            data_dict = game_data_json
-        state = SaveState(**data_dict)
 
-    # 2. Apply update
-    if event.type == "location" and isinstance(event.msg, dict):
-        state.location.room = event.msg.get("room", state.location.room)
-        # Coerce to int as in repo.saves
-        state.location.x = int(event.msg.get("x", state.location.x))
-        state.location.y = int(event.msg.get("y", state.location.y))
-    elif event.type in ("problem", "minigame") and event.id:
-        key = f"completed_{event.type}s"
-        bucket = state.notebook.setdefault(key, [])
-        if event.id not in bucket:
-            bucket.append(event.id)
-    
-    # 3. Save back
-    json_data = json.dumps(state.model_dump())
-    
-    await connection.execute(
-        '''
-        INSERT INTO game_saves (user_id, game_data)
-        VALUES ($1, $2)
-        ON CONFLICT (user_id) DO UPDATE
-            SET game_data = EXCLUDED.game_data
-        ''',
-        user_id,
-        json_data
-    )
+    # Lock before taking a connection, in the same order as the update drain
+    async with write_coordinator.lock(user_id), acquire_connection() as connection:
+        # Older buffered locations must not land on top of this batch
+        await location_buffer.flush_user(connection, user_id)
+
+        # Events are applied in order in one transaction and the save is written once
+        results = await apply_update_batch(connection, user_id, events)
 
-    return OkResponse(ok=True)
\ No newline at end of file
+    read_router.note_write(user_id, response)
+    return BatchUpdateResponse(ok=all(result.ok for result in results), results=results)
@@ -0,0 +1,103 @@
+import json
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+
+from core.config import settings
+from core.database import acquire_connection, authenticate, get_token_payload
+from core.location_buffer import location_buffer
+from core.read_routing import READ_PRIMARY_COOKIE, read_router
+from core.saves import apply_update_batch, fetch_save_json
+from core.write_coordinator import write_coordinator
+from models.update import UpdateEvent
+
+game_ws_router = APIRouter(tags=["game"])
+
+
+async def send_snapshot(websocket: WebSocket, user_id: int, seq: Any) -> None:
+    """Push the current save to the client as a ``sync`` message."""
+    read_primary_until = websocket.cookies.get(READ_PRIMARY_COOKIE)
+    # Writes the buffered location first, on the primary
+    async with read_router.acquire(user_id, read_primary_until) as connection:
+        game_data = await fetch_save_json(connection, user_id)
+    # The stored JSON text is embedded as is instead of being decoded and re-encoded
+    await websocket.send_text(
+        f'{{"type": "sync", "seq": {json.dumps(seq)}, "data": {game_data or "null"}}}'
+    )
+
+
+async def handle_message(websocket: WebSocket, user_id: int, message: Any) -> None:
+    """Apply one client message and send its reply."""
+    seq = message.get("seq") if isinstance(message, dict) else None
+
+    if isinstance(message, dict) and message.get("type") == "sync":
+        await send_snapshot(websocket, user_id, seq)
+        return
+
+    if isinstance(message, dict) and isinstance(message.get("events"), list):
+        # Same cap as PUT /game/update/batch; one frame is one transaction
+        if len(message["events"]) > settings.UPDATE_BATCH_MAX_EVENTS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {settings.UPDATE_BATCH_MAX_EVENTS} events per batch",
+            )
+        events = [UpdateEvent.model_validate(item) for item in message["events"]]
+        async with write_coordinator.lock(user_id), acquire_connection() as connection:
+            await location_buffer.flush_user(connection, user_id)
+            results = await apply_update_batch(connection, user_id, events)
+        read_router.note_write(user_id)
+        await websocket.send_json({
+            "type": "ack",
+            "seq": seq,
+            "ok": all(result.ok for result in results),
+            "results": [result.model_dump() for result in results],
+        })
+        return
+
+    event = UpdateEvent.model_validate(message)
+    read_router.note_write(user_id)
+    if not location_buffer.offer(user_id, event):
+        # Only holds a pool connection while the (possibly merged) write runs
+        await write_coordinator.submit(user_id, event)
+    await websocket.send_json({"type": "ack", "seq": seq, "ok": True})
+
+
+@game_ws_router.websocket("/game/ws")
+async def game_socket(websocket: WebSocket):
+    """Gameplay channel: authenticate once, then stream UpdateEvents.
+
+    Messages are a single ``UpdateEvent``, ``{"events": [...]}`` for a batch,
+    or ``{"type": "sync"}`` to request a snapshot. An optional ``seq`` is
+    echoed in the reply. A snapshot is pushed right after connecting.
+    """
+    try:
+        token = get_token_payload(websocket.cookies.get("access_token"))
+        user_id = await authenticate(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+
+    try:
+        await send_snapshot(websocket, user_id, None)
+        while True:
+            text = await websocket.receive_text()
+
+            try:
+                # Served from memory; catches logout, a newer login or expiry
+                await authenticate(token)
+            except HTTPException:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                return
+
+            try:
+                message = json.loads(text)
+                await handle_message(websocket, user_id, message)
+            except ValueError as exc:
+                # Malformed JSON or a pydantic ValidationError
+                await websocket.send_json({"type": "error", "ok": False, "message": str(exc)})
+            except HTTPException as exc:
+                await websocket.send_json({"type": "error", "ok": False, "message": exc.detail})
+    except WebSocketDisconnect:
+        return
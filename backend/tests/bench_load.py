@@ -0,0 +1,108 @@
+"""Mixed-workload load benchmark for the FastAPI backend.
+
+Not collected by default. Run explicitly with:
+
+    python -m pytest backend/tests/bench_load.py -s
+    BENCH_PLAYERS=50 BENCH_OUTPUT=bench.json python -m pytest backend/tests/bench_load.py -s
+
+Phases:
+1. auth_storm: BENCH_AUTH_USERS users register and log in concurrently
+2. gameplay: BENCH_PLAYERS players each send BENCH_UPDATES location updates,
+   with a /game/save every BENCH_SAVE_EVERY updates and a /game/sync every
+   BENCH_SYNC_EVERY updates
+
+Each phase reports req/s, p50/p95/p99 latency per route and DB statements per
+request as JSON.
+"""
+import asyncio
+import os
+import time
+from contextlib import AsyncExitStack
+
+import pytest
+from httpx import AsyncClient
+
+from core.config import settings
+from benchutil import LatencyRecorder, QueryCounter, emit_report, env_int, player_client
+
+PASSWORD = "benchmark-password"
+
+
+async def run_phase(queries: QueryCounter, work) -> dict:
+    recorder = LatencyRecorder()
+    before = queries.count
+    start = time.perf_counter()
+    await work(recorder)
+    elapsed = time.perf_counter() - start
+    report = recorder.report(elapsed)
+    report["db_queries"] = queries.count - before
+    report["db_queries_per_request"] = round(report["db_queries"] / max(recorder.total, 1), 2)
+    return report
+
+
+@pytest.mark.skipif(bool(os.environ.get("TEST_REMOTE_URL")), reason="local benchmark only")
+@pytest.mark.asyncio
+async def test_mixed_workload(client: AsyncClient, db_pool, monkeypatch):
+    # Every simulated client shares one IP
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    auth_users = env_int("BENCH_AUTH_USERS", 20)
+    players = env_int("BENCH_PLAYERS", 10)
+    updates = env_int("BENCH_UPDATES", 50)
+    save_every = env_int("BENCH_SAVE_EVERY", 25)
+    sync_every = env_int("BENCH_SYNC_EVERY", 10)
+
+    queries = QueryCounter()
+    queries.attach(monkeypatch)
+
+    async def auth_storm(recorder: LatencyRecorder) -> None:
+        async def one(i: int) -> None:
+            async with player_client() as pc:
+                credentials = {"user": f"storm_{i}@example.com", "pass": PASSWORD}
+                await recorder.request(pc, "POST /register", "POST", "/register", json=credentials)
+                await recorder.request(pc, "POST /login", "POST", "/login", json=credentials)
+
+        await asyncio.gather(*(one(i) for i in range(auth_users)))
+
+    async def gameplay(recorder: LatencyRecorder) -> None:
+        async def one(pc: AsyncClient) -> None:
+            for step in range(1, updates + 1):
+                await recorder.request(
+                    pc, "PUT /game/update", "PUT", "/game/update",
+                    json={"type": "location", "msg": {"room": "Hall", "x": step, "y": step}},
+                )
+                if step % save_every == 0:
+                    await recorder.request(pc, "POST /game/save", "POST", "/game/save", json={})
+                if step % sync_every == 0:
+                    await recorder.request(pc, "GET /game/sync", "GET", "/game/sync")
+
+        await asyncio.gather(*(one(pc) for pc in player_clients))
+
+    async with AsyncExitStack() as stack:
+        auth_report = await run_phase(queries, auth_storm)
+
+        # Player setup is not part of the measured gameplay phase
+        player_clients = []
+        for i in range(players):
+            pc = await stack.enter_async_context(player_client())
+            credentials = {"user": f"player_{i}@example.com", "pass": PASSWORD}
+            await pc.post("/register", json=credentials)
+            await pc.post("/login", json=credentials)
+            await pc.post("/game/save", json={})
+            player_clients.append(pc)
+
+        gameplay_report = await run_phase(queries, gameplay)
+
+    report = {
+        "config": {
+            "auth_users": auth_users,
+            "players": players,
+            "updates_per_player": updates,
+            "save_every": save_every,
+            "sync_every": sync_every,
+        },
+        "phases": {
+            "auth_storm": auth_report,
+            "gameplay": gameplay_report,
+        },
+    }
+    emit_report("mixed_workload", report)
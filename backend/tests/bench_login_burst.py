@@ -0,0 +1,70 @@
+"""Benchmark: /game/update latency while a burst of logins is hashing passwords.
+
+Not collected by default. Run explicitly with:
+
+    python -m pytest backend/tests/bench_login_burst.py -s
+
+The test prints a JSON report comparing /game/update latency with and without
+a concurrent login burst. With hashing offloaded to the worker pool, p99 should
+stay roughly flat between the two phases.
+"""
+import asyncio
+import os
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from core.config import settings
+from benchutil import emit_report, summarize
+
+PLAYER_UPDATES = 200
+BURST_USERS = 32
+PASSWORD = "benchmark-password"
+
+
+async def stream_updates(client: AsyncClient, count: int, cookie: str) -> list[float]:
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        response = await client.put(
+            "/game/update",
+            json={"type": "location", "msg": {"room": "Hall", "x": i, "y": i}},
+            cookies={"access_token": cookie},
+        )
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    return latencies
+
+
+@pytest.mark.skipif(bool(os.environ.get("TEST_REMOTE_URL")), reason="local benchmark only")
+@pytest.mark.asyncio
+async def test_update_latency_under_login_burst(client: AsyncClient, monkeypatch):
+    # Every simulated client shares one IP
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    await client.post("/register", json={"user": "player@example.com", "pass": PASSWORD})
+    await client.post("/login", json={"user": "player@example.com", "pass": PASSWORD})
+    await client.post("/game/save", json={})
+    player_cookie = client.cookies["access_token"]
+
+    emails = [f"burst_{i}@example.com" for i in range(BURST_USERS)]
+    for email in emails:
+        await client.post("/register", json={"user": email, "pass": PASSWORD})
+
+    baseline = await stream_updates(client, PLAYER_UPDATES, player_cookie)
+
+    async def login(email: str) -> int:
+        response = await client.post("/login", json={"user": email, "pass": PASSWORD})
+        return response.status_code
+
+    burst = asyncio.gather(*(login(email) for email in emails))
+    under_burst = await stream_updates(client, PLAYER_UPDATES, player_cookie)
+    statuses = await burst
+
+    report = {
+        "burst_logins": BURST_USERS,
+        "login_statuses": {str(code): statuses.count(code) for code in set(statuses)},
+        "baseline": summarize(baseline),
+        "under_burst": summarize(under_burst),
+    }
+    emit_report("update_latency_under_login_burst", report)
@@ -0,0 +1,109 @@
+"""Benchmark: CPU spent encoding and decoding large saves on /game/save and /game/sync.
+
+Not collected by default. Run explicitly with:
+
+    python -m pytest backend/tests/bench_save_codec.py -s
+    BENCH_NOTEBOOK_ENTRIES=5000 python -m pytest backend/tests/bench_save_codec.py -s
+
+Two measurements per document size:
+1. codec: process CPU per request for the previous path (json.loads, then
+   jsonable_encoder and json.dumps on sync; json.dumps of the parsed body on
+   save) against the pass-through path (raw JSONB text on sync; one orjson
+   validation on save)
+2. endpoint: process CPU and wall time per request through the app
+"""
+import json
+import os
+import time
+
+import orjson
+import pytest
+from fastapi.encoders import jsonable_encoder
+from httpx import AsyncClient
+
+from benchutil import emit_report, env_int, summarize
+
+PASSWORD = "benchmark-password"
+
+
+def large_save(entries: int) -> dict:
+    return {
+        "location": {"room": "Library", "x": 12, "y": 40},
+        "notebook": {
+            f"clue_{i}": {"text": f"Clue number {i} " * 4, "found": True, "tags": ["math", "room", i]}
+            for i in range(entries)
+        },
+        "access": {f"door_{i}": i % 2 == 0 for i in range(entries // 10)},
+        "npc": [{"id": f"npc{i}", "state": {"talked": True, "step": i}} for i in range(entries // 20)],
+    }
+
+
+def cpu_per_call(func, rounds: int) -> float:
+    start = time.process_time()
+    for _ in range(rounds):
+        func()
+    return (time.process_time() - start) / rounds
+
+
+def codec_report(document: dict, rounds: int) -> dict:
+    stored = json.dumps(document)  # JSONB text as asyncpg returns it
+    body = stored.encode()         # raw request body
+
+    def sync_before() -> None:
+        json.dumps(jsonable_encoder(json.loads(stored))).encode()
+
+    def sync_after() -> None:
+        stored.encode()
+
+    def save_before() -> None:
+        json.dumps(json.loads(body))
+
+    def save_after() -> None:
+        orjson.loads(body)
+        body.decode()
+
+    report = {}
+    for name, before, after in (("sync", sync_before, sync_after), ("save", save_before, save_after)):
+        cpu_before = cpu_per_call(before, rounds)
+        cpu_after = cpu_per_call(after, rounds)
+        report[name] = {
+            "before_cpu_ms": round(cpu_before * 1000, 3),
+            "after_cpu_ms": round(cpu_after * 1000, 3),
+            "saved_cpu_ms": round((cpu_before - cpu_after) * 1000, 3),
+        }
+    return report
+
+
+@pytest.mark.skipif(bool(os.environ.get("TEST_REMOTE_URL")), reason="local benchmark only")
+@pytest.mark.asyncio
+async def test_save_and_sync_codec_cost(client: AsyncClient):
+    entries = env_int("BENCH_NOTEBOOK_ENTRIES", 2000)
+    rounds = env_int("BENCH_ROUNDS", 50)
+    document = large_save(entries)
+
+    await client.post("/register", json={"user": "codec@example.com", "pass": PASSWORD})
+    await client.post("/login", json={"user": "codec@example.com", "pass": PASSWORD})
+    body = orjson.dumps(document)
+
+    endpoint = {}
+    for label, method, url, kwargs in (
+        ("POST /game/save", "POST", "/game/save", {"content": body, "headers": {"Content-Type": "application/json"}}),
+        ("GET /game/sync", "GET", "/game/sync", {}),
+    ):
+        samples = []
+        cpu_start = time.process_time()
+        for _ in range(rounds):
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            samples.append(time.perf_counter() - start)
+            assert response.status_code == 200
+        endpoint[label] = {
+            **summarize(samples),
+            "cpu_ms_per_request": round((time.process_time() - cpu_start) / rounds * 1000, 3),
+        }
+
+    emit_report("save_codec", {
+        "config": {"notebook_entries": entries, "rounds": rounds, "document_bytes": len(body)},
+        "codec": codec_report(document, rounds),
+        "endpoint": endpoint,
+    })
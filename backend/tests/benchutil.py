@@ -0,0 +1,129 @@
+"""Shared helpers for the load benchmarks in this directory (``bench_*.py``).
+
+Benchmarks are not collected by the default test run; pass the file to pytest
+explicitly. Reports are machine-readable JSON printed to stdout and, when
+``BENCH_OUTPUT`` is set, written to that path so runs can be compared across
+commits.
+"""
+import json
+import os
+import subprocess
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator
+
+import asyncpg  # type: ignore[import]
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from core import database
+from main import app
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples: list[float], elapsed: float | None = None) -> dict[str, Any]:
+    """Latency percentiles in milliseconds, plus throughput when ``elapsed`` is given."""
+    summary: dict[str, Any] = {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+    if elapsed:
+        summary["req_per_s"] = round(len(samples) / elapsed, 1)
+    return summary
+
+
+class LatencyRecorder:
+    """Collects request latencies per route label."""
+
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: AsyncClient, label: str, method: str, url: str, **kwargs: Any):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[label].append(time.perf_counter() - start)
+        self.statuses[label][response.status_code] += 1
+        return response
+
+    @property
+    def total(self) -> int:
+        return sum(len(samples) for samples in self.samples.values())
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        routes = {
+            label: {**summarize(samples, elapsed), "statuses": dict(self.statuses[label])}
+            for label, samples in sorted(self.samples.items())
+        }
+        everything = [s for samples in self.samples.values() for s in samples]
+        return {"elapsed_s": round(elapsed, 3), "all": summarize(everything, elapsed), "routes": routes}
+
+
+class QueryCounter:
+    """Counts statements the app executes, through asyncpg query loggers."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def _on_query(self, record: Any) -> None:
+        self.count += 1
+
+    def attach(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        # Every app checkout goes through acquire_from, so connections the
+        # pool opens during the run are counted as well as the ones idle now
+        acquire_from = database.acquire_from
+
+        @asynccontextmanager
+        async def counted_acquire_from(pool: asyncpg.Pool) -> AsyncIterator[asyncpg.Connection]:
+            async with acquire_from(pool) as connection:
+                # Loggers are a set, so re-adding on later checkouts is a no-op
+                connection.add_query_logger(self._on_query)
+                yield connection
+
+        monkeypatch.setattr(database, "acquire_from", counted_acquire_from)
+
+
+@asynccontextmanager
+async def player_client() -> AsyncGenerator[AsyncClient, None]:
+    """A client with its own cookie jar, talking to the in-process app.
+
+    Use alongside the ``client`` fixture so its database overrides are active.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def emit_report(name: str, report: dict[str, Any]) -> None:
+    """Print the report as JSON and write it to ``BENCH_OUTPUT`` when set."""
+    document = {"benchmark": name, "revision": git_revision(), **report}
+    text = json.dumps(document, indent=2)
+    print(text)
+
+    output = os.environ.get("BENCH_OUTPUT")
+    if output:
+        with open(output, "w") as fh:
+            fh.write(text + "\n")
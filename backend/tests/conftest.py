@@ -17,6 +17,13 @@ os.environ["DEBUG"] = "true"
 
 from main import app
 from core.database import get_db_pool, _pool_lock
+from core.event_log import event_compactor
+from core.health import health_checker
+from core.location_buffer import location_buffer
+from core.migrations import apply_migrations
+from core.rate_limit import memory_bucket_store
+from core.revocation import revocation_list
+from core.session_cache import session_cache
 
 # Define the scope of the temporary database
 # We use "session" so it spins up once per test run, but you could use "function" for isolation per test
@@ -52,33 +59,16 @@ async def setup_db(db_pool: asyncpg.Pool) -> AsyncGenerator[None, None]:
 
     async with db_pool.acquire() as connection:
         # Create tables
-        await connection.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id SERIAL PRIMARY KEY,
-                email TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-            );
-            CREATE TABLE IF NOT EXISTS session (
-                user_id INT NOT NULL,
-                session_id TEXT NOT NULL,
-                is_active BOOLEAN DEFAULT TRUE,
-                time_expire TIMESTAMP WITH TIME ZONE,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (session_id)
-            );
-            CREATE TABLE IF NOT EXISTS game_saves (
-                user_id INT PRIMARY KEY,
-                game_data JSONB,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
+        await apply_migrations(connection)
         yield
         # Clean up data (truncate tables)
-        await connection.execute("TRUNCATE users, session, game_saves RESTART IDENTITY CASCADE;")
+        await connection.execute("TRUNCATE users, session, revoked_session, game_saves, game_events, rate_limit_bucket RESTART IDENTITY CASCADE;")
+        session_cache.clear()
+        location_buffer.clear()
+        revocation_list.clear()
+        event_compactor.reset()
+        memory_bucket_store.clear()
+        health_checker.reset()
 
 
 @pytest.fixture
@@ -1,10 +1,17 @@
 
+import asyncio
+import gzip
+import brotli  # type: ignore[import]
 from typing import Dict, Any
 import pytest
 import json
 from httpx import AsyncClient
 from main import app
-from core.database import get_current_user, get_db_pool
+from core import compression, database
+from core.config import settings
+from core.database import get_current_user, get_db_pool, get_pool_stats
+from core.event_log import event_compactor
+from core.location_buffer import location_buffer
 
 # Mock user ID
 TEST_USER_ID = 1
@@ -45,6 +52,46 @@ async def test_health_get_ok(client: AsyncClient):
     assert r.json() == {"ok": True, "db_status": "connected"}
 
 
+@pytest.mark.asyncio
+async def test_health_head_skips_database(client: AsyncClient, monkeypatch):
+    import core.health as health_module
+
+    def fail():
+        raise AssertionError("HEAD /health must not acquire a connection")
+
+    monkeypatch.setattr(health_module, "acquire_connection", fail)
+    r = await client.head("/health")
+    assert r.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_lifespan_warms_pool_in_background(monkeypatch):
+    import main as main_module
+
+    release = asyncio.Event()
+    started = asyncio.Event()
+
+    async def slow_init_db_pool():
+        started.set()
+        await release.wait()
+
+    monkeypatch.setattr(settings, "DB_POOL_WARMUP_IN_BACKGROUND", True)
+    monkeypatch.setattr(settings, "AUTH_MODE", "session")
+    monkeypatch.setattr(settings, "DB_MIGRATE_ON_STARTUP", False)
+    monkeypatch.setattr(settings, "DB_VERIFY_SCHEMA", False)
+    monkeypatch.setattr(settings, "SESSION_REAP_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(settings, "HEALTH_CHECK_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(main_module, "init_db_pool", slow_init_db_pool)
+    monkeypatch.setattr(main_module, "close_db_pool", lambda: asyncio.sleep(0))
+
+    async with asyncio.timeout(2):
+        async with main_module.lifespan(app):
+            # Startup finished while the pool is still being created
+            await started.wait()
+            assert not release.is_set()
+        release.set()
+
+
 # ---------- game/save ----------
 
 @pytest.mark.asyncio
@@ -78,6 +125,157 @@ async def test_game_save_allows_empty_body_uses_defaults(client: AsyncClient, db
     assert isinstance(st["npc"], list)
 
 
+@pytest.mark.asyncio
+async def test_game_save_stores_body_as_sent_and_rejects_invalid_json(client: AsyncClient, db_pool):
+    body = b'{"location": {"room": "Hall", "x": 1, "y": 2}, "notebook": {"a": [1, 2]}, "access": {}, "npc": []}'
+    r = await client.post("/game/save", content=body, headers={"Content-Type": "application/json"})
+    assert r.status_code == 200
+
+    r = await client.get("/game/sync")
+    assert r.headers["content-type"] == "application/json"
+    assert r.json() == json.loads(body)
+
+    r = await client.post("/game/save", content=b'{"location": ', headers={"Content-Type": "application/json"})
+    assert r.status_code == 422
+    assert (await get_state_from_db(db_pool))["location"]["room"] == "Hall"
+
+
+@pytest.mark.asyncio
+async def test_game_save_merge_patch_and_json_patch(client: AsyncClient, db_pool):
+    r = await client.post("/game/save", json={"location": {"room": "Hall", "x": 1, "y": 1},
+                                              "notebook": {"a": 1, "b": 2}, "access": {}, "npc": []})
+    etag = r.headers["etag"]
+
+    r = await client.post(
+        "/game/save",
+        content=json.dumps({"notebook": {"b": None, "c": 3}}),
+        headers={"Content-Type": "application/merge-patch+json", "If-Match": etag},
+    )
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    etag = r.headers["etag"]
+
+    r = await client.post(
+        "/game/save",
+        content=json.dumps([{"op": "add", "path": "/npc/-", "value": {"id": "npc1", "state": {}}}]),
+        headers={"Content-Type": "application/json-patch+json", "If-Match": etag},
+    )
+    assert r.status_code == 200
+
+    st = await get_state_from_db(db_pool)
+    assert st["notebook"] == {"a": 1, "c": 3}
+    assert st["npc"] == [{"id": "npc1", "state": {}}]
+    assert st["location"]["room"] == "Hall"
+
+
+@pytest.mark.asyncio
+async def test_game_save_patch_conflicts(client: AsyncClient, db_pool):
+    r = await client.post("/game/save", json={})
+    stale = r.headers["etag"]
+    await client.put("/game/update", json={"type": "location", "msg": {"x": 5}})
+
+    r = await client.post(
+        "/game/save",
+        content=json.dumps({"notebook": {"a": 1}}),
+        headers={"Content-Type": "application/merge-patch+json", "If-Match": stale},
+    )
+    assert r.status_code == 412
+
+    r = await client.post(
+        "/game/save",
+        content=json.dumps([{"op": "test", "path": "/location/x", "value": 0}]),
+        headers={"Content-Type": "application/json-patch+json"},
+    )
+    assert r.status_code == 409
+
+    r = await client.post(
+        "/game/save",
+        content=json.dumps([{"op": "remove", "path": "/nope"}]),
+        headers={"Content-Type": "application/json-patch+json"},
+    )
+    assert r.status_code == 422
+
+    st = await get_state_from_db(db_pool)
+    assert st["notebook"] == {} and st["location"]["x"] == 5
+
+
+@pytest.mark.asyncio
+async def test_game_save_rejects_malformed_documents(client: AsyncClient, db_pool):
+    await client.post("/game/save", json={"notebook": {"a": 1}})
+
+    r = await client.post(
+        "/game/save", content=json.dumps([1, 2]),
+        headers={"Content-Type": "application/merge-patch+json"},
+    )
+    assert r.status_code == 422
+    r = await client.post(
+        "/game/save",
+        content=json.dumps([{"op": "replace", "path": "/notebook", "value": "x"}]),
+        headers={"Content-Type": "application/json-patch+json"},
+    )
+    assert r.status_code == 422
+    assert "notebook" in r.json()["detail"]
+
+    for body in ([1, 2], {"notebook": None}, {"location": "Hall"}, {"npc": {"id": "npc1"}}, {"npc": [1]}):
+        r = await client.post("/game/save", json=body)
+        assert r.status_code == 422, body
+
+    st = await get_state_from_db(db_pool)
+    assert st["notebook"] == {"a": 1}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding, compress", [("gzip", gzip.compress), ("br", brotli.compress)])
+async def test_game_save_and_sync_compressed(client: AsyncClient, db_pool, encoding, compress):
+    state = {"location": {"room": "Hall", "x": 1, "y": 1},
+             "notebook": {f"clue_{i}": "text " * 10 for i in range(100)}, "access": {}, "npc": []}
+    r = await client.post(
+        "/game/save",
+        content=compress(json.dumps(state).encode()),
+        headers={"Content-Type": "application/json", "Content-Encoding": encoding},
+    )
+    assert r.status_code == 200
+
+    r = await client.get("/game/sync", headers={"Accept-Encoding": encoding})
+    assert r.headers["content-encoding"] == encoding
+    assert "Accept-Encoding" in r.headers["vary"]
+    assert r.json() == state
+
+
+def test_brotli_bomb_is_decoded_a_bounded_amount():
+    decoder = compression._Decoder("br")
+    out = decoder.feed(brotli.compress(b"x" * 10_000_000), 2000)
+    assert 2000 < len(out) <= 2001
+
+
+@pytest.mark.asyncio
+async def test_game_save_size_limits(client: AsyncClient, db_pool, monkeypatch):
+    monkeypatch.setattr(settings, "SAVE_MAX_BYTES", 2000)
+    monkeypatch.setattr(settings, "SAVE_NOTEBOOK_MAX_BYTES", 500)
+
+    # Total limit applies to the decoded body, so a small gzip bomb is refused too
+    bomb = gzip.compress(b'{"notebook": {"a": "' + b"x" * 100_000 + b'"}}')
+    r = await client.post(
+        "/game/save", content=bomb,
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+    assert r.status_code == 413
+
+    r = await client.post("/game/save", json={"notebook": {"a": "x" * 600}})
+    assert r.status_code == 413
+    assert "notebook" in r.json()["detail"]
+
+    # Patches are checked against the resulting document
+    await client.post("/game/save", json={})
+    r = await client.post(
+        "/game/save",
+        content=json.dumps({"notebook": {"a": "x" * 600}}),
+        headers={"Content-Type": "application/merge-patch+json"},
+    )
+    assert r.status_code == 413
+    assert (await get_state_from_db(db_pool))["notebook"] == {}
+
+
 # ---------- game/update ----------
 
 @pytest.mark.asyncio
@@ -136,6 +334,96 @@ async def test_game_update_minigame_idempotent_completion_log(client: AsyncClien
     assert bucket == ["m7"]
 
 
+@pytest.mark.asyncio
+async def test_game_update_creates_default_save_on_first_write(client: AsyncClient, db_pool):
+    r = await client.put("/game/update", json={"type": "problem", "id": "p1"})
+    assert r.status_code == 200
+
+    st = await get_state_from_db(db_pool)
+    assert st["location"] == {"room": "Start", "x": 0, "y": 0}
+    assert [n["id"] for n in st["npc"]] == ["npc1", "npc2"]
+    assert st["notebook"]["completed_problems"] == ["p1"]
+
+
+@pytest.mark.asyncio
+async def test_game_update_merges_notebook_access_and_npc(client: AsyncClient, db_pool):
+    await client.post("/game/save", json={"npc": [{"id": "npc1", "state": {"met": True}}]})
+
+    await client.put("/game/update", json={"type": "notebook", "msg": {"clue": "knife"}})
+    await client.put("/game/update", json={"type": "access", "msg": {"library": True}})
+    await client.put("/game/update", json={"type": "npc", "id": "npc1", "msg": {"talked": True}})
+    await client.put("/game/update", json={"type": "npc", "id": "butler", "msg": {"suspect": True}})
+
+    st = await get_state_from_db(db_pool)
+    assert st["notebook"]["clue"] == "knife"
+    assert st["access"] == {"library": True}
+    assert st["npc"] == [
+        {"id": "npc1", "state": {"met": True, "talked": True}},
+        {"id": "butler", "state": {"suspect": True}},
+    ]
+
+
+async def store_raw_save(db_pool, game_data: str) -> None:
+    """Store a document the API would now refuse, as an older release may have."""
+    async with db_pool.acquire() as connection:
+        await connection.execute(
+            "INSERT INTO users (user_id, email, password) VALUES ($1, 'raw@example.com', 'x') ON CONFLICT DO NOTHING",
+            TEST_USER_ID,
+        )
+        await connection.execute(
+            """
+            INSERT INTO game_saves (user_id, game_data) VALUES ($1, $2)
+            ON CONFLICT (user_id) DO UPDATE SET game_data = EXCLUDED.game_data
+            """,
+            TEST_USER_ID,
+            game_data,
+        )
+
+
+@pytest.mark.asyncio
+async def test_game_update_survives_malformed_stored_save(client: AsyncClient, db_pool):
+    await store_raw_save(db_pool, json.dumps(
+        {"location": "Hall", "notebook": None, "access": [], "npc": {"id": "npc1"}, "extra": 1}
+    ))
+    for event in (
+        {"type": "location", "msg": {"x": 3}},
+        {"type": "problem", "id": "p1"},
+        {"type": "access", "msg": {"library": True}},
+        {"type": "npc", "id": "npc1", "msg": {"met": True}},
+    ):
+        r = await client.put("/game/update", json=event)
+        assert r.status_code == 200
+
+    st = await get_state_from_db(db_pool)
+    assert st["location"] == {"x": 3}
+    assert st["notebook"] == {"completed_problems": ["p1"]}
+    assert st["access"] == {"library": True}
+    assert st["npc"] == [{"id": "npc1", "state": {"met": True}}]
+    assert st["extra"] == 1
+
+    # A document that is not an object is replaced by the default, never NULL
+    await store_raw_save(db_pool, "[1, 2]")
+    r = await client.put("/game/update", json={"type": "problem", "id": "p2"})
+    assert r.status_code == 200
+    st = await get_state_from_db(db_pool)
+    assert st["notebook"] == {"completed_problems": ["p2"]}
+    assert st["location"] == {"room": "Start", "x": 0, "y": 0}
+
+
+@pytest.mark.asyncio
+async def test_game_update_concurrent_events_are_not_lost(client: AsyncClient, db_pool):
+    await client.post("/game/save", json={})
+
+    ids = [f"p{i}" for i in range(10)]
+    responses = await asyncio.gather(
+        *(client.put("/game/update", json={"type": "problem", "id": pid}) for pid in ids)
+    )
+    assert all(r.status_code == 200 for r in responses)
+
+    st = await get_state_from_db(db_pool)
+    assert sorted(st["notebook"]["completed_problems"]) == sorted(ids)
+
+
 @pytest.mark.asyncio
 async def test_game_update_rejects_unknown_type(client: AsyncClient):
     # Literal["problem","minigame","location","notebook","access","npc"]
@@ -143,6 +431,175 @@ async def test_game_update_rejects_unknown_type(client: AsyncClient):
     assert r.status_code == 422  # Pydantic validation error
 
 
+@pytest.mark.asyncio
+async def test_game_update_location_write_behind_flushes_on_sync(client: AsyncClient, db_pool, monkeypatch):
+    monkeypatch.setattr(settings, "LOCATION_WRITE_BEHIND", True)
+    await client.post("/game/save", json={})
+
+    for x in range(5):
+        r = await client.put("/game/update", json={"type": "location", "msg": {"room": "Lab", "x": x, "y": 1}})
+        assert r.status_code == 200
+
+    # Buffered, not yet written
+    st = await get_state_from_db(db_pool)
+    assert st["location"] == {"room": "Start", "x": 0, "y": 0}
+    assert len(location_buffer) == 1
+
+    r = await client.get("/game/sync")
+    assert r.json()["location"] == {"room": "Lab", "x": 4, "y": 1}
+    assert len(location_buffer) == 0
+
+
+@pytest.mark.asyncio
+async def test_game_update_location_write_behind_bulk_flush(client: AsyncClient, db_pool, monkeypatch):
+    monkeypatch.setattr(settings, "LOCATION_WRITE_BEHIND", True)
+
+    await client.put("/game/update", json={"type": "location", "msg": {"room": "Attic", "x": "7", "y": "8"}})
+    location_buffer.put(2, {"x": 3})
+
+    async with db_pool.acquire() as connection:
+        assert await location_buffer.flush(connection) == 2
+
+    st = await get_state_from_db(db_pool)
+    assert st["location"] == {"room": "Attic", "x": 7, "y": 8}
+    assert [n["id"] for n in st["npc"]] == ["npc1", "npc2"]
+
+
+@pytest.mark.asyncio
+async def test_game_update_location_write_behind_flush_survives_malformed_save(
+    client: AsyncClient, db_pool, monkeypatch
+):
+    monkeypatch.setattr(settings, "LOCATION_WRITE_BEHIND", True)
+    # A location of the wrong type, then a document that is not an object
+    for stored, location, notebook in (
+        ({"location": "Hall", "notebook": {"a": 1}}, {"x": 2}, {"a": 1}),
+        ([1, 2], {"room": "Start", "x": 2, "y": 0}, {}),
+    ):
+        await store_raw_save(db_pool, json.dumps(stored))
+        location_buffer.put(TEST_USER_ID, {"x": 2})
+        async with db_pool.acquire() as connection:
+            assert await location_buffer.flush(connection) == 1
+        st = await get_state_from_db(db_pool)
+        assert st["location"] == location
+        assert st["notebook"] == notebook
+
+
+# ---------- game/update/batch ----------
+
+@pytest.mark.asyncio
+async def test_game_update_batch_applies_in_order_and_coalesces_locations(client: AsyncClient, db_pool):
+    await client.post("/game/save", json={})
+
+    events = [
+        {"type": "location", "msg": {"room": "Hall", "x": 1, "y": 1}},
+        {"type": "problem", "id": "p1"},
+        {"type": "location", "msg": {"x": 2, "y": 2}},
+        {"type": "problem", "id": "p1"},
+        {"type": "location", "msg": {"x": "bad"}},
+        {"type": "minigame", "id": "m1"},
+    ]
+    r = await client.put("/game/update/batch", json=events)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["ok"] is False
+    assert [res["status"] for res in body["results"]] == [
+        "coalesced", "applied", "applied", "unchanged", "rejected", "applied",
+    ]
+    assert [res["index"] for res in body["results"]] == list(range(len(events)))
+
+    st = await get_state_from_db(db_pool)
+    assert st["location"] == {"room": "Hall", "x": 2, "y": 2}
+    assert st["notebook"]["completed_problems"] == ["p1"]
+    assert st["notebook"]["completed_minigames"] == ["m1"]
+
+
+@pytest.mark.asyncio
+async def test_game_update_batch_survives_malformed_stored_save(client: AsyncClient, db_pool):
+    await store_raw_save(db_pool, json.dumps({"notebook": [None, {"completed_problems": ["p1"]}], "npc": None}))
+    r = await client.put("/game/update/batch", json=[
+        {"type": "problem", "id": "p2"},
+        {"type": "npc", "id": "npc1", "msg": {"met": True}},
+    ])
+    assert r.status_code == 200
+
+    st = await get_state_from_db(db_pool)
+    assert st["notebook"] == {"completed_problems": ["p2"]}
+    assert st["npc"] == [{"id": "npc1", "state": {"met": True}}]
+
+
+@pytest.mark.asyncio
+async def test_game_update_batch_creates_default_save(client: AsyncClient, db_pool):
+    r = await client.put("/game/update/batch", json=[{"type": "notebook", "msg": {"clue": "rope"}}])
+    assert r.status_code == 200
+    assert r.json()["ok"] is True
+
+    st = await get_state_from_db(db_pool)
+    assert st["notebook"] == {"clue": "rope"}
+    assert [n["id"] for n in st["npc"]] == ["npc1", "npc2"]
+
+
+# ---------- game event log ----------
+
+@pytest.mark.asyncio
+async def test_game_event_log_appends_and_sync_folds(client: AsyncClient, db_pool, monkeypatch):
+    monkeypatch.setattr(settings, "GAME_EVENT_LOG", True)
+    await client.post("/game/save", json={})
+
+    await client.put("/game/update", json={"type": "location", "msg": {"room": "Lab", "x": 1, "y": 2}})
+    await client.put("/game/update/batch", json=[
+        {"type": "problem", "id": "p1"},
+        {"type": "notebook", "msg": {"clue": "rope"}},
+    ])
+
+    # Logged only; the snapshot is untouched until compaction
+    st = await get_state_from_db(db_pool)
+    assert st["location"] == {"room": "Start", "x": 0, "y": 0}
+    async with db_pool.acquire() as connection:
+        assert await connection.fetchval("SELECT count(*) FROM game_events") == 3
+
+    r = await client.get("/game/sync")
+    body = r.json()
+    assert body["location"] == {"room": "Lab", "x": 1, "y": 2}
+    assert body["notebook"]["completed_problems"] == ["p1"]
+    assert body["notebook"]["clue"] == "rope"
+    etag = r.headers["etag"]
+
+    async with db_pool.acquire() as connection:
+        assert await event_compactor.compact(connection) == 1
+        # Nothing new to fold on a second pass
+        assert await event_compactor.compact(connection) == 0
+
+    st = await get_state_from_db(db_pool)
+    assert st["location"] == {"room": "Lab", "x": 1, "y": 2}
+    assert st["notebook"]["completed_problems"] == ["p1"]
+
+    # Compaction does not change what sync returns
+    r = await client.get("/game/sync", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    await client.put("/game/update", json={"type": "access", "msg": {"door": True}})
+    r = await client.get("/game/sync", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["access"] == {"door": True}
+
+
+@pytest.mark.asyncio
+async def test_game_event_log_retention_and_full_save(client: AsyncClient, db_pool, monkeypatch):
+    monkeypatch.setattr(settings, "GAME_EVENT_LOG", True)
+    monkeypatch.setattr(settings, "GAME_EVENT_RETENTION_HOURS", 0)
+
+    await client.put("/game/update", json={"type": "problem", "id": "p1"})
+    # A full save supersedes everything logged before it
+    await client.post("/game/save", json={"location": {"room": "Hall", "x": 0, "y": 0}})
+    r = await client.get("/game/sync")
+    assert r.json()["location"]["room"] == "Hall"
+    assert "completed_problems" not in r.json().get("notebook", {})
+
+    async with db_pool.acquire() as connection:
+        await event_compactor.compact(connection)
+        assert await connection.fetchval("SELECT count(*) FROM game_events") == 0
+
+
 # ---------- game/sync  ----------
 
 @pytest.mark.asyncio
@@ -153,4 +610,89 @@ async def test_game_sync_if_present(client: AsyncClient, db_pool):
     r = await client.get("/game/sync")
     assert r.status_code == 200
     body = r.json()
-    assert "location" in body and "notebook" in body and "access" in body and "npc" in body
\ No newline at end of file
+    assert "location" in body and "notebook" in body and "access" in body and "npc" in body
+
+
+@pytest.mark.asyncio
+async def test_game_sync_conditional_get(client: AsyncClient, db_pool):
+    await client.post("/game/save", json={})
+
+    r = await client.get("/game/sync")
+    etag = r.headers["etag"]
+
+    r = await client.get("/game/sync", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+
+    # Any write bumps the version
+    await client.put("/game/update", json={"type": "location", "msg": {"x": 3, "y": 4}})
+    r = await client.get("/game/sync", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert r.json()["location"]["x"] == 3
+    etag = r.headers["etag"]
+
+    # An update that changes nothing is not a write
+    for event in ({"type": "location", "msg": {"x": 3}}, {"type": "notebook", "msg": {}}):
+        assert (await client.put("/game/update", json=event)).status_code == 200
+        r = await client.get("/game/sync", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+    await client.put("/game/update", json={"type": "problem", "id": "p1"})
+    r = await client.get("/game/sync", headers={"If-None-Match": etag})
+    etag = r.headers["etag"]
+    await client.put("/game/update", json={"type": "problem", "id": "p1"})
+    assert (await client.get("/game/sync", headers={"If-None-Match": etag})).status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_game_sync_etag_is_per_user(client: AsyncClient, db_pool):
+    await client.post("/game/save", json={})
+    r = await client.get("/game/sync")
+    etag = r.headers["etag"]
+    assert "Cookie" in r.headers["vary"]
+
+    # Another account at the same version on a shared browser cache
+    async with db_pool.acquire() as connection:
+        await connection.execute("INSERT INTO users (user_id, email, password) VALUES (2, 'b@example.com', 'x')")
+        await connection.execute("""INSERT INTO game_saves (user_id, game_data) VALUES (2, '{"location": {"room": "B", "x": 0, "y": 0}}')""")
+    app.dependency_overrides[get_current_user] = lambda: 2
+    r = await client.get("/game/sync", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["location"]["room"] == "B"
+
+
+# ---------- pool instrumentation ----------
+
+@pytest.mark.asyncio
+async def test_session_settings_survive_pool_release(postgresql, monkeypatch):
+    monkeypatch.setattr(settings, "DB_SESSION_SETTINGS", {"statement_timeout": "4321ms"})
+    monkeypatch.setattr(settings, "DB_POOL_MIN_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_POOL_MAX_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_CONNECTION_BUDGET", None)
+    pool = await database._create_pool(postgresql.url())
+    try:
+        # One connection, released (and RESET ALL) in between
+        for _ in range(2):
+            async with pool.acquire() as connection:
+                assert await connection.fetchval("SHOW statement_timeout") == "4321ms"
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_exhaustion_is_reported_as_timeout(client: AsyncClient, db_pool, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_ACQUIRE_TIMEOUT", 0.05)
+    before = get_pool_stats()
+
+    held = [await db_pool.acquire() for _ in range(db_pool.get_idle_size())]
+    try:
+        r = await client.get("/game/sync")
+    finally:
+        for connection in held:
+            await db_pool.release(connection)
+
+    assert r.status_code == 503
+    after = get_pool_stats()
+    assert after["acquire_timeouts"] == before["acquire_timeouts"] + 1
+    assert after["waiting"] == 0
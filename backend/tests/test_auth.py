@@ -1,6 +1,10 @@
+import asyncio
+
 import pytest
 from httpx import AsyncClient
 
+from core.location_buffer import LocationBuffer, location_buffer
+
 @pytest.mark.asyncio
 async def test_register_login_delete_flow(client: AsyncClient):
     email = "test@example.com"
@@ -86,3 +90,37 @@ async def test_delete_invalid_credentials(client: AsyncClient):
         json={"user": email, "pass": "wrongpass"},
     )
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_delete_waits_for_a_flush_of_the_users_location(client: AsyncClient, db_pool, monkeypatch):
+    email = "flush@example.com"
+    password = "password123"
+    await client.post("/register", json={"user": email, "pass": password})
+    async with db_pool.acquire() as connection:
+        user_id = await connection.fetchval("SELECT user_id FROM users WHERE email = $1", email)
+
+    # A background flush has taken the entry and is still writing it
+    real_write = LocationBuffer._write
+    writing = asyncio.Event()
+
+    async def slow_write(connection, batch):
+        writing.set()
+        await asyncio.sleep(0.2)
+        await real_write(connection, batch)
+
+    monkeypatch.setattr(LocationBuffer, "_write", staticmethod(slow_write))
+    location_buffer.put(user_id, {"x": 1, "y": 1})
+
+    async def background_flush():
+        async with db_pool.acquire() as connection:
+            await location_buffer.flush(connection)
+
+    flush = asyncio.create_task(background_flush())
+    await writing.wait()
+    response = await client.request("DELETE", "/delete", json={"user": email, "pass": password})
+    assert response.status_code == 200
+    await flush
+
+    async with db_pool.acquire() as connection:
+        assert await connection.fetchval("SELECT count(*) FROM game_saves WHERE user_id = $1", user_id) == 0
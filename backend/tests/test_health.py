@@ -0,0 +1,81 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from httpx import AsyncClient
+
+import core.health as health_module
+from core.config import settings
+from core.database import pool_metrics
+from core.health import health_checker
+
+
+@asynccontextmanager
+async def failing_connection():
+    raise ConnectionError("database is down")
+    yield
+
+
+@pytest.mark.asyncio
+async def test_live_does_no_io(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(health_module, "acquire_connection", failing_connection)
+    for method in ("GET", "HEAD"):
+        r = await client.request(method, "/health/live")
+        assert r.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_ready_reports_cached_check(client: AsyncClient, monkeypatch):
+    r = await client.get("/health/ready")
+    assert r.status_code == 503
+    assert r.json()["reasons"] == ["database not checked yet"]
+
+    await health_checker.check()
+    r = await client.get("/health/ready")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["ok"] is True
+    assert body["db_status"] == "connected"
+    assert body["replication_lag_seconds"] is None  # not a standby
+    assert body["reasons"] == []
+
+    # Probes read the cache, even once the database is gone
+    monkeypatch.setattr(health_module, "acquire_connection", failing_connection)
+    assert (await client.get("/health/ready")).status_code == 200
+    assert (await client.get("/health")).json() == {"ok": True, "db_status": "connected"}
+
+    await health_checker.check()
+    r = await client.get("/health/ready")
+    assert r.status_code == 503
+    assert r.json()["reasons"] == ["database disconnected"]
+    # The legacy endpoint stays 200 and only reports the status
+    r = await client.get("/health")
+    assert r.status_code == 200
+    assert r.json() == {"ok": True, "db_status": "disconnected"}
+
+
+@pytest.mark.asyncio
+async def test_ready_sheds_traffic_when_pool_saturated(client: AsyncClient, monkeypatch):
+    await health_checker.check()
+    monkeypatch.setattr(pool_metrics, "waiting", settings.HEALTH_MAX_POOL_WAITING + 1)
+    r = await client.get("/health/ready")
+    assert r.status_code == 503
+    assert r.json()["reasons"] == ["connection pool saturated"]
+
+    monkeypatch.setattr(pool_metrics, "waiting", 0)
+    monkeypatch.setattr(pool_metrics, "acquire_timeouts", pool_metrics.acquire_timeouts + 1)
+    await health_checker.check()
+    assert health_checker.readiness()["reasons"] == ["connection pool acquire timeouts"]
+    # Cleared by the next check without new timeouts
+    await health_checker.check()
+    assert health_checker.readiness()["ok"] is True
+
+
+@pytest.mark.asyncio
+async def test_ready_fails_on_stale_status_or_replication_lag(client: AsyncClient, monkeypatch):
+    await health_checker.check()
+    health_checker.checked_at -= 10 * settings.HEALTH_CHECK_INTERVAL_SECONDS
+    assert health_checker.readiness()["reasons"] == ["database status is stale"]
+
+    await health_checker.check()
+    health_checker.replication_lag_seconds = settings.HEALTH_MAX_REPLICATION_LAG_SECONDS + 1
+    assert health_checker.readiness()["reasons"] == ["replication lag too high"]
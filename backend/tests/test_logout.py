@@ -1,7 +1,11 @@
+import asyncio
+
 import pytest
 from httpx import AsyncClient
 from fastapi import status
 
+from core.config import settings
+
 @pytest.mark.asyncio
 async def test_logout(client: AsyncClient):
     """Test that a user can log out successfully."""
@@ -57,3 +61,34 @@ async def test_single_session_enforcement(client: AsyncClient):
     # We manually set the cookie to the old value
     response_old = await client.post("/logout", cookies={"access_token": cookie_value1})
     assert response_old.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_concurrent_logins_leave_one_session(client: AsyncClient, db_pool, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    email = "concurrent_login@example.com"
+    password = "password123"
+    await client.post("/register", json={"user": email, "pass": password})
+
+    responses = await asyncio.gather(
+        *(client.post("/login", json={"user": email, "pass": password}) for _ in range(5))
+    )
+    assert all(r.status_code == status.HTTP_200_OK for r in responses)
+
+    async with db_pool.acquire() as connection:
+        assert await connection.fetchval("SELECT count(*) FROM session") == 1
+
+
+@pytest.mark.asyncio
+async def test_session_expiry_follows_settings(client: AsyncClient, db_pool, monkeypatch):
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_EXPIRE_MINUTES", 90)
+    email = "expiry@example.com"
+    password = "password123"
+    await client.post("/register", json={"user": email, "pass": password})
+    await client.post("/login", json={"user": email, "pass": password})
+
+    async with db_pool.acquire() as connection:
+        minutes = await connection.fetchval(
+            "SELECT EXTRACT(EPOCH FROM time_expire - NOW()) / 60 FROM session"
+        )
+    assert 89 < minutes <= 90
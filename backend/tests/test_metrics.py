@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+
+import asyncpg  # type: ignore[import]
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from core.config import settings
+from core.metrics import (
+    _on_query,
+    aggregate,
+    collect_snapshots,
+    install_query_timing,
+    mark_process_dead,
+    prepare_multiproc_dir,
+    registry,
+    render_prometheus,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template(client: AsyncClient):
+    await client.get("/")
+    await client.get("/does-not-exist")
+    await client.get("/game/sync")
+
+    requests = registry.counters["http_requests_total"]
+    assert requests[("/", "GET", "200")] == 1
+    assert requests[("<unmatched>", "GET", "404")] == 1
+    assert requests[("/game/sync", "GET", "401")] == 1
+    assert registry.in_flight == 0
+
+    response = await client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{route="/game/sync",method="GET",status="401"} 1' in body
+    assert 'http_request_duration_seconds_bucket{route="/",method="GET",status="200",le="+Inf"} 1' in body
+    assert "db_pool_size" in body
+
+
+@pytest.mark.asyncio
+async def test_query_timing_hook(db_pool: asyncpg.Pool):
+    async with db_pool.acquire() as connection:
+        await install_query_timing(connection)
+        try:
+            await connection.fetchval("SELECT 1")
+            with pytest.raises(asyncpg.PostgresError):
+                await connection.execute("UPDATE missing_table SET x = 1")
+            # Loggers are scheduled with call_soon
+            await asyncio.sleep(0)
+        finally:
+            connection.remove_query_logger(_on_query)
+
+    queries = registry.counters["db_queries_total"]
+    assert queries[("<background>", "SELECT", "ok")] == 1
+    assert queries[("<background>", "UPDATE", "error")] == 1
+    assert registry.histograms["db_query_duration_seconds"][("<background>", "SELECT")][-1] > 0
+
+
+def test_snapshots_aggregate_across_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    registry.inc("http_requests_total", ("/", "GET", "200"), 2)
+
+    # A worker that has exited: its counters count, its gauges do not
+    dead_pid = 2 ** 22 + 1
+    with open(os.path.join(tmp_path, f"metrics-{dead_pid}.json"), "w") as fh:
+        json.dump({
+            "pid": dead_pid,
+            "counters": {"http_requests_total": [[["/", "GET", "200"], 3]]},
+            "histograms": {},
+            "gauges": {"http_requests_in_flight": 7},
+        }, fh)
+
+    data = aggregate(collect_snapshots())
+    assert data["counters"]["http_requests_total"][("/", "GET", "200")] == 5
+    assert data["gauges"]["http_requests_in_flight"] == 0
+
+
+def test_pool_and_cache_totals_are_counters(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    registry.counter_sources.append(lambda: {"db_pool_acquires_total": 4})
+    try:
+        # Another worker's acquires add to this one's
+        with open(os.path.join(tmp_path, "metrics-1.json"), "w") as fh:
+            json.dump({
+                "pid": 1,
+                "counters": {"db_pool_acquires_total": [[[], 3]]},
+                "histograms": {},
+                "gauges": {},
+            }, fh)
+        body = render_prometheus(aggregate(collect_snapshots()))
+    finally:
+        registry.counter_sources.pop()
+    assert "# TYPE db_pool_acquires_total counter" in body
+    assert "\ndb_pool_acquires_total 7\n" in body
+
+
+def test_exited_worker_keeps_counters_and_drops_gauges(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    # A stale snapshot from an earlier run is removed at startup
+    (tmp_path / "metrics-5.json").write_text("{}")
+    prepare_multiproc_dir(str(tmp_path))
+    assert not os.listdir(tmp_path)
+
+    # pid 1 stays alive, so only mark_process_dead drops the gauges
+    with open(os.path.join(tmp_path, "metrics-1.json"), "w") as fh:
+        json.dump({
+            "pid": 1,
+            "counters": {"http_requests_total": [[["/", "GET", "200"], 3]]},
+            "histograms": {},
+            "gauges": {"http_requests_in_flight": 7},
+        }, fh)
+    mark_process_dead(1)
+
+    data = aggregate(collect_snapshots())
+    assert data["counters"]["http_requests_total"][("/", "GET", "200")] == 3
+    assert data["gauges"]["http_requests_in_flight"] == 0
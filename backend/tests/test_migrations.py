@@ -0,0 +1,77 @@
+import asyncio
+
+import asyncpg  # type: ignore[import]
+import pytest
+
+from core.migrations import (
+    SchemaError,
+    apply_migrations,
+    applied_versions,
+    load_migrations,
+    verify_schema,
+)
+
+
+def write_migrations(directory, files: dict[str, str]) -> None:
+    for name, sql in files.items():
+        (directory / name).write_text(sql)
+
+
+@pytest.mark.asyncio
+async def test_migrations_are_applied_once(db_pool: asyncpg.Pool):
+    async with db_pool.acquire() as connection:
+        # conftest already brought the database up to date
+        assert await apply_migrations(connection) == []
+        assert await applied_versions(connection) == {m.version for m in load_migrations()}
+        await verify_schema(connection)
+
+
+@pytest.mark.asyncio
+async def test_verify_schema_reports_missing_index(db_pool: asyncpg.Pool):
+    async with db_pool.acquire() as connection:
+        await connection.execute("DROP INDEX session_user_id_key")
+        try:
+            with pytest.raises(SchemaError, match="session_user_id_key"):
+                await verify_schema(connection)
+        finally:
+            await connection.execute("CREATE UNIQUE INDEX session_user_id_key ON session (user_id)")
+
+
+def test_load_migrations_orders_by_version_and_rejects_duplicates(tmp_path):
+    write_migrations(tmp_path, {"10_b.sql": "", "2_a.sql": "", "notes.txt": ""})
+    assert [(m.version, m.name) for m in load_migrations(str(tmp_path))] == [(2, "a"), (10, "b")]
+
+    write_migrations(tmp_path, {"002_again.sql": ""})
+    with pytest.raises(SchemaError, match="Duplicate"):
+        load_migrations(str(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_runners_apply_each_migration_once(db_pool: asyncpg.Pool, tmp_path):
+    write_migrations(tmp_path, {
+        "001_table.sql": "CREATE TABLE widgets (id INT PRIMARY KEY, owner INT);",
+        "002_index.sql": "-- migrate: no-transaction\nCREATE INDEX CONCURRENTLY widgets_owner_idx ON widgets (owner);",
+    })
+    migrations = load_migrations(str(tmp_path))
+    assert [m.transactional for m in migrations] == [True, False]
+
+    first, second = await db_pool.acquire(), await db_pool.acquire()
+    try:
+        await first.execute("CREATE SCHEMA migrations_test")
+        for connection in (first, second):
+            await connection.execute("SET search_path TO migrations_test")
+
+        results = await asyncio.gather(
+            apply_migrations(first, migrations),
+            apply_migrations(second, migrations),
+        )
+        assert sorted(results[0] + results[1]) == [1, 2]
+        assert await applied_versions(first) == {1, 2}
+        assert await first.fetchval(
+            "SELECT count(*) FROM pg_indexes WHERE schemaname = 'migrations_test' AND indexname = 'widgets_owner_idx'"
+        ) == 1
+    finally:
+        await first.execute("DROP SCHEMA migrations_test CASCADE")
+        for connection in (first, second):
+            await connection.execute("RESET search_path")
+            await db_pool.release(connection)
@@ -0,0 +1,62 @@
+import pytest
+
+from core.patch import PatchError, PatchTestFailed, apply_json_patch, apply_merge_patch
+
+
+def test_merge_patch_rfc7396_example():
+    target = {
+        "title": "Goodbye!",
+        "author": {"givenName": "John", "familyName": "Doe"},
+        "tags": ["example", "sample"],
+        "content": "This will be unchanged",
+    }
+    patch = {
+        "title": "Hello!",
+        "phoneNumber": "+01-123-456-7890",
+        "author": {"familyName": None},
+        "tags": ["example"],
+    }
+    assert apply_merge_patch(target, patch) == {
+        "title": "Hello!",
+        "author": {"givenName": "John"},
+        "tags": ["example"],
+        "content": "This will be unchanged",
+        "phoneNumber": "+01-123-456-7890",
+    }
+
+
+def test_json_patch_operations():
+    doc = {"notebook": {"clues": ["a", "c"]}, "npc": [{"id": "npc1"}], "a~b": {"c/d": 1}}
+    result = apply_json_patch(doc, [
+        {"op": "add", "path": "/notebook/clues/1", "value": "b"},
+        {"op": "add", "path": "/notebook/clues/-", "value": "d"},
+        {"op": "replace", "path": "/npc/0/id", "value": "npc9"},
+        {"op": "copy", "from": "/npc/0", "path": "/npc/-"},
+        {"op": "move", "from": "/a~0b/c~1d", "path": "/moved"},
+        {"op": "remove", "path": "/a~0b"},
+        {"op": "test", "path": "/moved", "value": 1},
+    ])
+    assert result == {
+        "notebook": {"clues": ["a", "b", "c", "d"]},
+        "npc": [{"id": "npc9"}, {"id": "npc9"}],
+        "moved": 1,
+    }
+
+
+@pytest.mark.parametrize("operations", [
+    {"op": "add"},
+    [{"op": "remove", "path": "/missing"}],
+    [{"op": "replace", "path": "/list/5", "value": 1}],
+    [{"op": "add", "path": "/list/01", "value": 1}],
+    [{"op": "move", "from": "/list", "path": "/list/0"}],
+    [{"op": "add", "path": "no-slash", "value": 1}],
+    [{"op": "frobnicate", "path": "/list"}],
+])
+def test_json_patch_rejects_invalid_operations(operations):
+    with pytest.raises(PatchError):
+        apply_json_patch({"list": [1, 2]}, operations)
+
+
+def test_json_patch_test_operation_uses_json_equality():
+    with pytest.raises(PatchTestFailed):
+        apply_json_patch({"flag": 1}, [{"op": "test", "path": "/flag", "value": True}])
@@ -0,0 +1,87 @@
+import asyncpg  # type: ignore[import]
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from core import security
+from core.config import settings
+from core.rate_limit import MemoryBucketStore
+
+
+@pytest.fixture(params=["memory", "postgres"])
+def bucket_store(request, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_STORE", request.param)
+    return request.param
+
+
+@pytest.mark.asyncio
+async def test_email_limit_returns_429_before_hashing(client: AsyncClient, bucket_store, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_EMAIL_BURST", 3)
+    await client.post("/register", json={"user": "target@example.com", "pass": "password123"})
+    verified = []
+    monkeypatch.setattr(security, "verify_password", lambda *args: verified.append(args) or False)
+
+    credentials = {"user": "target@example.com", "pass": "wrong"}
+    statuses = [(await client.post("/login", json=credentials)).status_code for _ in range(4)]
+    assert statuses == [401, 401, 429, 429]
+    assert len(verified) == 2
+
+    response = await client.post("/login", json=credentials)
+    assert int(response.headers["retry-after"]) >= 1
+
+    # Other emails from the same client still get through
+    response = await client.post("/login", json={"user": "Other@example.com", "pass": "wrong"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_ip_limit_is_shared_by_auth_endpoints(client: AsyncClient, bucket_store, monkeypatch, db_pool):
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_BURST", 4)
+
+    for i in range(2):
+        await client.post("/register", json={"user": f"ip{i}@example.com", "pass": "password123"})
+        await client.post("/login", json={"user": f"ip{i}@example.com", "pass": "password123"})
+
+    response = await client.request("DELETE", "/delete", json={"user": "ip0@example.com", "pass": "password123"})
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    # Rejected before touching the database: the account is still there
+    async with db_pool.acquire() as connection:
+        assert await connection.fetchval("SELECT count(*) FROM users") == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_ip_is_not_limited_by_default(client: AsyncClient, monkeypatch):
+    # A classroom logging in at once through one NAT address
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_BURST", 2)
+    statuses = [
+        (await client.post("/login", json={"user": f"student{i}@example.com", "pass": "wrong"})).status_code
+        for i in range(5)
+    ]
+    assert statuses == [status.HTTP_401_UNAUTHORIZED] * 5
+
+
+@pytest.mark.asyncio
+async def test_full_hash_queue_is_rejected_up_front(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "HASH_QUEUE_LIMIT", 0)
+    response = await client.post("/register", json={"user": "busy@example.com", "pass": "password123"})
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+@pytest.mark.asyncio
+async def test_memory_bucket_refills_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("core.rate_limit.time.monotonic", lambda: now[0])
+    store = MemoryBucketStore(maxsize=2)
+
+    assert await store.take("a", rate=1.0, burst=2) == 0
+    assert await store.take("a", rate=1.0, burst=2) == 0
+    assert await store.take("a", rate=1.0, burst=2) == pytest.approx(1.0)
+
+    now[0] += 1.5
+    assert await store.take("a", rate=1.0, burst=2) == 0
+
+    await store.take("b", rate=1.0, burst=2)
+    await store.take("c", rate=1.0, burst=2)
+    assert list(store._buckets) == ["b", "c"]
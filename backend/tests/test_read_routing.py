@@ -0,0 +1,169 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import asyncpg  # type: ignore[import]
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+
+from core import database, read_routing
+from core.config import settings
+from core.database import close_db_pool, get_replica_pools, get_session_user, init_replica_pools, set_replica_available
+from core.health import health_checker
+from core.location_buffer import location_buffer
+from core.migrations import apply_migrations
+from core.read_routing import READ_PRIMARY_COOKIE, read_router
+from core.session_cache import session_cache
+from main import app
+
+TEST_USER_ID = 1
+
+
+@pytest.fixture
+async def replica(postgresql, db_pool: asyncpg.Pool, monkeypatch):
+    """A second database with the schema but none of the data: a replica that has not caught up."""
+    async with db_pool.acquire() as connection:
+        if not await connection.fetchval("SELECT 1 FROM pg_database WHERE datname = 'replica'"):
+            await connection.execute("CREATE DATABASE replica")
+    dsn = postgresql.url().rsplit("/", 1)[0] + "/replica"
+    replica_connection = await asyncpg.connect(dsn)
+    try:
+        await apply_migrations(replica_connection)
+        await replica_connection.execute("TRUNCATE users, session, game_saves RESTART IDENTITY CASCADE")
+    finally:
+        await replica_connection.close()
+
+    monkeypatch.setattr(settings, "DB_REPLICA_URLS", [dsn])
+    await init_replica_pools()
+    yield
+    await close_db_pool()
+    read_router.clear()
+
+
+@pytest.fixture
+def as_test_user():
+    app.dependency_overrides[database.get_current_user] = lambda: TEST_USER_ID
+    yield
+
+
+async def seed_save(db_pool: asyncpg.Pool) -> None:
+    async with db_pool.acquire() as connection:
+        await connection.execute(
+            "INSERT INTO users (user_id, email, password) VALUES ($1, 'r@example.com', 'x')", TEST_USER_ID
+        )
+        await connection.execute(
+            """INSERT INTO game_saves (user_id, game_data) VALUES ($1, '{"location": {"room": "Start", "x": 0, "y": 0}}')""",
+            TEST_USER_ID,
+        )
+
+
+@pytest.mark.asyncio
+async def test_sync_reads_replica_except_after_own_write(client: AsyncClient, db_pool, replica, as_test_user):
+    await seed_save(db_pool)
+    # Not on the replica yet, and the user has not written through this app
+    assert (await client.get("/game/sync")).status_code == 404
+
+    r = await client.post("/game/save", json={"location": {"room": "Hall", "x": 1, "y": 2}})
+    assert r.status_code == 200
+    assert READ_PRIMARY_COOKIE in r.headers["set-cookie"]
+    r = await client.get("/game/sync")
+    assert r.status_code == 200
+    assert r.json()["location"]["room"] == "Hall"
+
+    # Another worker only has the cookie to go by
+    read_router.clear()
+    assert READ_PRIMARY_COOKIE in r.request.headers["cookie"]
+    assert (await client.get("/game/sync")).status_code == 200
+    client.cookies.set(READ_PRIMARY_COOKIE, "1")  # window long over
+    assert (await client.get("/game/sync")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_sync_reads_primary_with_buffered_location_or_no_replica(
+    client: AsyncClient, db_pool, replica, as_test_user
+):
+    await seed_save(db_pool)
+    location_buffer.put(TEST_USER_ID, {"x": 5})
+    r = await client.get("/game/sync")
+    assert r.status_code == 200
+    assert r.json()["location"]["x"] == 5
+
+    [pool] = get_replica_pools()
+    set_replica_available(pool, False)
+    assert (await client.get("/game/sync")).status_code == 200
+    set_replica_available(pool, True)
+    assert (await client.get("/game/sync")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_location_buffered_during_acquire_is_written_on_primary(
+    client: AsyncClient, db_pool, replica, as_test_user, monkeypatch
+):
+    await seed_save(db_pool)
+    real_acquire = read_routing.acquire_read_connection
+
+    @asynccontextmanager
+    async def acquire_while_location_arrives():
+        async with real_acquire() as connection:
+            location_buffer.put(TEST_USER_ID, {"x": 9})
+            yield connection
+
+    monkeypatch.setattr(read_routing, "acquire_read_connection", acquire_while_location_arrives)
+    r = await client.get("/game/sync")
+    assert r.status_code == 200
+    assert r.json()["location"]["x"] == 9
+    assert TEST_USER_ID not in location_buffer
+
+@pytest.mark.asyncio
+async def test_session_lookup_stays_on_primary(client: AsyncClient, db_pool, replica):
+    # Still on the replica, already deleted on the primary (a logout within the lag)
+    async with database.acquire_read_connection() as connection:
+        await connection.execute(
+            "INSERT INTO users (user_id, email, password) VALUES (7, 's@example.com', 'x')"
+        )
+        await connection.execute(
+            "INSERT INTO session (user_id, session_id, time_expire) VALUES (7, 'gone', NOW() + INTERVAL '1 hour')"
+        )
+    with pytest.raises(HTTPException):
+        await get_session_user("gone")
+    assert session_cache.get("gone") is None
+
+
+@pytest.mark.asyncio
+async def test_health_check_tracks_replicas(client: AsyncClient, replica, monkeypatch):
+    await health_checker.check()
+    await health_checker.check_replicas()
+    assert health_checker.readiness()["replicas_available"] == 1
+
+    monkeypatch.setattr(settings, "DB_REPLICA_MAX_LAG_SECONDS", -1.0)
+    monkeypatch.setattr("core.health._REPLICATION_LAG_QUERY", "SELECT 0::float8")
+    await health_checker.check()
+    await health_checker.check_replicas()
+    readiness = health_checker.readiness()
+    # Reads fall back to the primary; the worker stays ready
+    assert readiness["replicas_available"] == 0
+    assert readiness["ok"] is True
+    assert database.pick_replica() is None
+
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_does_not_delay_readiness(client: AsyncClient, monkeypatch):
+    async def connect_forever():
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(settings, "DB_REPLICA_URLS", ["postgresql://unreachable/db"])
+    monkeypatch.setattr(settings, "HEALTH_CHECK_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr("core.health.init_replica_pools", connect_forever)
+
+    health_checker.start(60)
+    try:
+        async with asyncio.timeout(2):
+            while health_checker.checked_at is None:
+                await asyncio.sleep(0.01)
+        assert health_checker.readiness()["ok"] is True
+        # The replica loop gives up after the probe timeout too
+        async with asyncio.timeout(2):
+            await health_checker.check_replicas()
+        assert health_checker.replicas_available == 0
+    finally:
+        await health_checker.stop()
@@ -0,0 +1,54 @@
+import runpy
+from pathlib import Path
+
+import pytest
+
+from core import server
+from core.config import settings
+from core.database import pool_max_size
+
+
+def test_workers_default_to_available_cpus(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", None)
+    monkeypatch.setattr(settings, "DB_CONNECTION_BUDGET", None)
+    monkeypatch.setattr(server, "available_cpus", lambda: 6)
+    assert server.worker_count() == 6
+
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 2)
+    assert server.worker_count() == 2
+
+
+def test_connection_budget_caps_workers_and_pools(monkeypatch):
+    monkeypatch.setattr(server, "available_cpus", lambda: 16)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", None)
+    monkeypatch.setattr(settings, "DB_CONNECTION_BUDGET", 20)
+    workers = server.worker_count()
+    assert workers == 10
+
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", workers)
+    assert pool_max_size() == 2
+    assert pool_max_size() * workers <= settings.DB_CONNECTION_BUDGET
+
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 3)
+    assert pool_max_size() == 6
+
+    monkeypatch.setattr(settings, "DB_CONNECTION_BUDGET", 1)
+    with pytest.raises(RuntimeError):
+        server.worker_count()
+
+
+def test_pool_size_without_budget(monkeypatch):
+    monkeypatch.setattr(settings, "DB_CONNECTION_BUDGET", None)
+    assert pool_max_size() == settings.DB_POOL_MAX_SIZE
+
+
+def test_gunicorn_config_trusts_configured_proxies(monkeypatch):
+    # Loading the config sets these; monkeypatch restores them afterwards
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 2)
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    monkeypatch.setattr(settings, "FORWARDED_ALLOW_IPS", "*")
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", None)
+    monkeypatch.delenv("METRICS_MULTIPROC_DIR", raising=False)
+    config = runpy.run_path(str(Path(__file__).parents[1] / "gunicorn.conf.py"))
+    assert config["forwarded_allow_ips"] == "*"
+    assert config["workers"] == 2
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from core.session_cache import SessionCache, session_cache
+
+
+async def login(client: AsyncClient, email: str, password: str = "password123"):
+    await client.post("/register", json={"user": email, "pass": password})
+    response = await client.post("/login", json={"user": email, "pass": password})
+    assert response.status_code == status.HTTP_200_OK
+    return response
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_hit_session_cache(client: AsyncClient, db_pool):
+    await login(client, "cache_hit@example.com")
+
+    await client.post("/game/save", json={})
+    for i in range(5):
+        response = await client.put(
+            "/game/update", json={"type": "location", "msg": {"room": "Hall", "x": i, "y": i}}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    stats = session_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 5
+
+
+@pytest.mark.asyncio
+async def test_relogin_invalidates_cached_session(client: AsyncClient):
+    response1 = await login(client, "cache_relogin@example.com")
+    old_cookie = response1.cookies["access_token"]
+
+    # Warm the cache with the first session
+    response = await client.get("/game/sync", cookies={"access_token": old_cookie})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    await client.post("/login", json={"user": "cache_relogin@example.com", "pass": "password123"})
+
+    response = await client.get("/game/sync", cookies={"access_token": old_cookie})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_cache_entry_never_outlives_session_expiry():
+    cache = SessionCache(maxsize=10, ttl=3600)
+
+    cache.set("expired", 1, datetime.now(timezone.utc) - timedelta(seconds=1))
+    assert cache.get("expired") is None
+
+    cache.set("live", 2, datetime.now(timezone.utc) + timedelta(minutes=5))
+    assert cache.get("live") == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_cache_is_bounded_lru():
+    cache = SessionCache(maxsize=2, ttl=60)
+    expires = datetime.now(timezone.utc) + timedelta(minutes=5)
+
+    cache.set("a", 1, expires)
+    cache.set("b", 2, expires)
+    cache.get("a")
+    cache.set("c", 3, expires)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
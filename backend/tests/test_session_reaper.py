@@ -0,0 +1,57 @@
+import asyncpg  # type: ignore[import]
+import pytest
+
+from core.config import settings
+from core.session_reaper import session_reaper
+
+
+async def insert_sessions(
+    connection: asyncpg.Connection, prefix: str, first_user_id: int, count: int, expire: str
+) -> None:
+    await connection.execute(
+        f'''
+        INSERT INTO session (user_id, session_id, time_expire)
+        SELECT i, $1 || i, NOW() + INTERVAL '{expire}'
+        FROM generate_series($2::int, $2::int + $3::int - 1) AS i
+        ''',
+        prefix,
+        first_user_id,
+        count,
+    )
+
+
+@pytest.mark.asyncio
+async def test_reap_deletes_only_expired_sessions_in_batches(db_pool: asyncpg.Pool):
+    async with db_pool.acquire() as connection:
+        await insert_sessions(connection, "expired-", 1, 25, "-1 minute")
+        await insert_sessions(connection, "live-", 100, 5, "1 hour")
+
+        assert await session_reaper.reap(connection, batch_size=10) == 25
+        remaining = await connection.fetch("SELECT session_id FROM session")
+        assert all(row["session_id"].startswith("live-") for row in remaining)
+        assert len(remaining) == 5
+
+        assert await session_reaper.reap(connection, batch_size=10) == 0
+
+
+@pytest.mark.asyncio
+async def test_reap_prunes_expired_revocations_in_stateless_mode(db_pool: asyncpg.Pool, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_MODE", "stateless")
+    async with db_pool.acquire() as connection:
+        await connection.execute(
+            '''
+            INSERT INTO revoked_session (session_id, user_id, time_expire) VALUES
+                ('old', 1, NOW() - INTERVAL '1 minute'),
+                ('new', 1, NOW() + INTERVAL '1 hour')
+            '''
+        )
+        await session_reaper.reap(connection)
+        assert await connection.fetchval("SELECT array_agg(session_id) FROM revoked_session") == ["new"]
+
+
+@pytest.mark.asyncio
+async def test_session_indexes_exist(db_pool: asyncpg.Pool):
+    async with db_pool.acquire() as connection:
+        indexes = await connection.fetch("SELECT indexname FROM pg_indexes WHERE tablename = 'session'")
+    names = {row["indexname"] for row in indexes}
+    assert {"session_user_id_key", "session_time_expire_idx"} <= names
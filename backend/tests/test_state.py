@@ -0,0 +1,50 @@
+from core.saves import apply_event, decode_save
+from core.state import GameState
+from models.update import UpdateEvent
+
+
+def test_completion_logs_are_set_backed_and_keep_order():
+    state = GameState.from_doc(decode_save('{"notebook": {"completed_problems": ["p1"]}}'))
+
+    assert not apply_event(state, UpdateEvent(type="problem", id="p1"))
+    assert apply_event(state, UpdateEvent(type="problem", id="p2"))
+    assert apply_event(state, UpdateEvent(type="minigame", id="m1"))
+    assert not apply_event(state, UpdateEvent(type="problem", id="p2"))
+
+    assert state.doc["notebook"]["completed_problems"] == ["p1", "p2"]
+    assert state.doc["notebook"]["completed_minigames"] == ["m1"]
+
+
+def test_npc_updates_use_index_and_edit_document():
+    state = GameState.from_doc(decode_save(None))
+
+    assert apply_event(state, UpdateEvent(type="npc", id="npc2", value={"talked": True}))
+    assert apply_event(state, UpdateEvent(type="npc", id="npc3", value={"mood": "happy"}))
+    assert apply_event(state, UpdateEvent(type="npc", id="npc3", value={"mood": "sad"}))
+    assert not apply_event(state, UpdateEvent(type="npc", id="npc3", value={"mood": "sad"}))
+
+    npcs = {npc["id"]: npc["state"] for npc in state.doc["npc"]}
+    assert npcs["npc2"] == {"talked": True}
+    assert npcs["npc3"] == {"mood": "sad"}
+    assert len(state.doc["npc"]) == 3
+
+
+def test_malformed_sections_are_treated_as_empty():
+    assert decode_save("[1, 2]") == decode_save(None)
+
+    state = GameState.from_doc(decode_save(
+        '{"location": "Hall", "notebook": {"completed_problems": {"p1": true}}, "access": null,'
+        ' "npc": [1, {"id": "npc1", "state": "x"}], "extra": 1}'
+    ))
+    assert apply_event(state, UpdateEvent(type="location", msg={"x": 3}))
+    assert apply_event(state, UpdateEvent(type="problem", id="p1"))
+    assert apply_event(state, UpdateEvent(type="access", value={"library": True}))
+    assert apply_event(state, UpdateEvent(type="npc", id="npc1", value={"met": True}))
+
+    assert state.doc == {
+        "location": {"x": 3},
+        "notebook": {"completed_problems": ["p1"]},
+        "access": {"library": True},
+        "npc": [1, {"id": "npc1", "state": {"met": True}}],
+        "extra": 1,
+    }
@@ -0,0 +1,97 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import asyncpg  # type: ignore[import]
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from core.config import settings
+from core.revocation import RevocationList, revocation_list
+
+
+@pytest.fixture(autouse=True)
+def stateless_mode(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_MODE", "stateless")
+
+
+async def login(client: AsyncClient, email: str, password: str = "password123"):
+    await client.post("/register", json={"user": email, "pass": password})
+    response = await client.post("/login", json={"user": email, "pass": password})
+    assert response.status_code == status.HTTP_200_OK
+    return response.cookies["access_token"]
+
+
+@pytest.mark.asyncio
+async def test_valid_token_needs_no_session_row(client: AsyncClient, db_pool: asyncpg.Pool):
+    await login(client, "stateless@example.com")
+
+    # The session table is not consulted for authentication
+    async with db_pool.acquire() as connection:
+        await connection.execute("DELETE FROM session")
+
+    response = await client.put("/game/update", json={"type": "location", "msg": {"x": 1, "y": 2}})
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_logout_and_relogin_revoke_tokens(client: AsyncClient):
+    first = await login(client, "stateless_revoke@example.com")
+    second = await login(client, "stateless_revoke@example.com")
+
+    response = await client.get("/game/sync", cookies={"access_token": first})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    client.cookies.set("access_token", second)
+    response = await client.post("/logout")
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await client.get("/game/sync", cookies={"access_token": second})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert len(revocation_list) == 2
+
+
+@pytest.mark.asyncio
+async def test_refresh_loads_revocations_from_other_workers(db_pool: asyncpg.Pool):
+    other_worker = RevocationList()
+    expires = datetime.now(timezone.utc) + timedelta(minutes=5)
+
+    async with db_pool.acquire() as connection:
+        await connection.execute(
+            "INSERT INTO revoked_session (session_id, user_id, time_expire) VALUES ('old', 1, $1)",
+            expires,
+        )
+        assert await other_worker.refresh(connection) == 1
+
+        await connection.execute(
+            '''
+            INSERT INTO revoked_session (session_id, user_id, time_expire)
+            VALUES ('new', 1, $1), ('expired', 1, NOW() - interval '1 minute')
+            ''',
+            expires,
+        )
+        await other_worker.refresh(connection)
+
+    assert other_worker.is_revoked("old")
+    assert other_worker.is_revoked("new")
+    assert not other_worker.is_revoked("expired")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_logins_revoke_every_replaced_session(client: AsyncClient, db_pool: asyncpg.Pool):
+    email = "stateless_concurrent@example.com"
+    await client.post("/register", json={"user": email, "pass": "password123"})
+    responses = await asyncio.gather(
+        *(client.post("/login", json={"user": email, "pass": "password123"}) for _ in range(4))
+    )
+
+    async with db_pool.acquire() as connection:
+        assert await connection.fetchval("SELECT count(*) FROM session") == 1
+        assert await connection.fetchval("SELECT count(*) FROM revoked_session") == 3
+
+    # Exactly one of the issued tokens still works
+    working = 0
+    for response in responses:
+        r = await client.get("/game/sync", cookies={"access_token": response.cookies["access_token"]})
+        working += r.status_code != status.HTTP_401_UNAUTHORIZED
+    assert working == 1
@@ -0,0 +1,75 @@
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from core.config import settings
+from main import app
+
+
+@pytest.fixture
+def ws_client(postgresql, monkeypatch):
+    """A synchronous client whose app opens its own pool on the temporary database."""
+    monkeypatch.setattr(settings, "DATABASE_URL", postgresql.url())
+    with TestClient(app) as tc:
+        yield tc
+
+
+def login(tc: TestClient, email: str, password: str = "password123") -> None:
+    tc.post("/register", json={"user": email, "pass": password})
+    response = tc.post("/login", json={"user": email, "pass": password})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_ws_rejects_missing_cookie(ws_client: TestClient):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with ws_client.websocket_connect("/game/ws") as ws:
+            ws.receive_json()
+    assert exc.value.code == status.WS_1008_POLICY_VIOLATION
+
+
+def test_ws_applies_events_and_pushes_snapshots(ws_client: TestClient):
+    login(ws_client, "ws_player@example.com")
+    ws_client.post("/game/save", json={})
+
+    with ws_client.websocket_connect("/game/ws") as ws:
+        snapshot = ws.receive_json()
+        assert snapshot["type"] == "sync"
+        assert snapshot["data"]["location"]["room"] == "Start"
+
+        ws.send_json({"seq": 1, "type": "location", "msg": {"room": "Lab", "x": 3, "y": 4}})
+        assert ws.receive_json() == {"type": "ack", "seq": 1, "ok": True}
+
+        ws.send_json({"seq": 2, "events": [{"type": "problem", "id": "p1"}, {"type": "problem", "id": "p1"}]})
+        ack = ws.receive_json()
+        assert ack["seq"] == 2
+        assert [r["status"] for r in ack["results"]] == ["applied", "unchanged"]
+
+        ws.send_json({"seq": 3, "type": "teleport"})
+        assert ws.receive_json()["type"] == "error"
+
+        too_many = [{"type": "problem", "id": "p2"}] * (settings.UPDATE_BATCH_MAX_EVENTS + 1)
+        ws.send_json({"seq": 5, "events": too_many})
+        error = ws.receive_json()
+        assert error["type"] == "error"
+        assert str(settings.UPDATE_BATCH_MAX_EVENTS) in error["message"]
+
+        ws.send_json({"seq": 4, "type": "sync"})
+        snapshot = ws.receive_json()
+        assert snapshot["seq"] == 4
+        assert snapshot["data"]["location"] == {"room": "Lab", "x": 3, "y": 4}
+        # The oversized batch was not applied
+        assert snapshot["data"]["notebook"]["completed_problems"] == ["p1"]
+
+
+def test_ws_closes_after_logout(ws_client: TestClient):
+    login(ws_client, "ws_logout@example.com")
+
+    with ws_client.websocket_connect("/game/ws") as ws:
+        ws.receive_json()
+        ws_client.post("/logout")
+
+        ws.send_json({"type": "problem", "id": "p1"})
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+        assert exc.value.code == status.WS_1008_POLICY_VIOLATION
@@ -0,0 +1,120 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import asyncpg  # type: ignore[import]
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+
+from core import write_coordinator as coordinator_module
+from core.config import settings
+from core.database import get_current_user
+from core.write_coordinator import WriteCoordinator, write_coordinator
+from main import app
+from models.update import UpdateEvent
+
+TEST_USER_ID = 1
+
+
+@pytest.fixture(autouse=True)
+def override_auth():
+    async def mock_get_current_user():
+        return TEST_USER_ID
+
+    app.dependency_overrides[get_current_user] = mock_get_current_user
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_are_merged_into_fewer_writes(client: AsyncClient, db_pool):
+    responses = await asyncio.gather(
+        *(client.put("/game/update", json={"type": "problem", "id": f"p{i}"}) for i in range(20))
+    )
+    assert all(r.status_code == 200 for r in responses)
+
+    async with db_pool.acquire() as connection:
+        row = await connection.fetchrow("SELECT version, game_data FROM game_saves WHERE user_id = $1", TEST_USER_ID)
+    assert sorted(row["game_data"].count(f'"p{i}"') for i in range(20)) == [1] * 20
+    # The first event is written alone, the rest queue up behind it
+    assert row["version"] < 20
+    assert len(write_coordinator) == 0
+
+
+@pytest.mark.asyncio
+async def test_saves_and_updates_share_a_one_connection_pool(client: AsyncClient, postgresql, monkeypatch):
+    # Both paths take the user's lock before a connection, so neither holds
+    # the only connection while waiting for the lock
+    pool = await asyncpg.create_pool(dsn=postgresql.url(), min_size=1, max_size=1)
+    monkeypatch.setattr(settings, "DB_POOL_ACQUIRE_TIMEOUT", 2.0)
+
+    async def one_connection_pool():
+        return pool
+
+    try:
+        with patch("core.database.get_db_pool", side_effect=one_connection_pool):
+            requests = []
+            for i in range(5):
+                requests.append(client.put("/game/update", json={"type": "problem", "id": f"p{i}"}))
+                requests.append(client.post("/game/save", json={}))
+                requests.append(client.put("/game/update/batch", json=[{"type": "problem", "id": f"b{i}"}]))
+            responses = await asyncio.wait_for(asyncio.gather(*requests), timeout=10)
+    finally:
+        await pool.close()
+    assert [r.status_code for r in responses] == [200] * 15
+
+@pytest.mark.asyncio
+async def test_lock_serializes_one_user_only():
+    coordinator = WriteCoordinator()
+    order = []
+
+    async def write(user_id: int, name: str, hold: float) -> None:
+        async with coordinator.lock(user_id):
+            order.append(f"{name} start")
+            await asyncio.sleep(hold)
+            order.append(f"{name} end")
+
+    await asyncio.gather(write(1, "a", 0.02), write(1, "b", 0), write(2, "c", 0))
+    assert order.index("a end") < order.index("b start")
+    assert order.index("c end") < order.index("a end")
+    assert len(coordinator) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_merged_write_fails_every_caller(monkeypatch):
+    calls = []
+
+    async def failing_batch(connection, user_id, events):
+        calls.append(len(events))
+        raise RuntimeError("database went away")
+
+    @asynccontextmanager
+    async def no_connection():
+        yield None
+
+    monkeypatch.setattr(coordinator_module, "acquire_connection", no_connection)
+    monkeypatch.setattr(coordinator_module, "apply_update_batch", failing_batch)
+    coordinator = WriteCoordinator()
+
+    async with coordinator.lock(TEST_USER_ID):
+        # Queued behind the held lock, then written together
+        submits = [
+            asyncio.create_task(coordinator.submit(TEST_USER_ID, UpdateEvent(type="problem", id=f"p{i}")))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+
+    results = await asyncio.gather(*submits, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert calls == [3]
+    assert len(coordinator) == 0
+
+
+@pytest.mark.asyncio
+async def test_invalid_location_is_rejected_before_queueing():
+    coordinator = WriteCoordinator()
+    with pytest.raises(HTTPException) as exc_info:
+        await coordinator.submit(TEST_USER_ID, UpdateEvent(type="location", msg={"x": "left"}))
+    assert exc_info.value.status_code == 422
+    assert len(coordinator) == 0